@@ -1,13 +1,26 @@
-from typing import Dict, Any, Optional, TypedDict
-from collections import defaultdict
+import asyncio
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, TypedDict
+from collections import ChainMap
+
+import orjson
 
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 from ..core import logger, settings
 from ..models.schemas import ReviewResponse, TaskReview
-from ..services import RepositoryService, ExcelService
-from ..chains.review_chains import ReviewChain
+from ..services import RepositoryService, ExcelService, ExcelWriteQueue, CodeAnalysisService
+from ..chains.review_chains import get_review_chain
+from ..chains.prompts import REVIEW_PROMPT_VERSION
+
+
+# Stateless analyzer shared by all agents
+_analysis_service = CodeAnalysisService()
 
 
 class ReviewState(TypedDict):
@@ -17,8 +30,10 @@ class ReviewState(TypedDict):
     task: Optional[str]
     current_step: str
     error_message: Optional[str]
-    code_content: Dict[str, str]
+    code_content: Dict[str, Dict[str, str]]
     code_metrics: Dict[str, Any]
+    cache_key: Optional[str]
+    cached: bool
     review_result: Optional[Dict[str, Any]]
     final_response: Optional[ReviewResponse]
 
@@ -26,22 +41,22 @@ class ReviewState(TypedDict):
 class HomeworkReviewAgent:
     """Main agent for homework review workflow."""
 
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            google_api_key=settings.google_api_key,
-            model=settings.gemini_model,
-            temperature=0.1,
-            convert_system_message_to_human=True
-        )
+    def __init__(self, excel_writer: Optional[ExcelWriteQueue] = None):
+        self.review_chain = get_review_chain()
+        self.llm = self.review_chain.llm
         self.repo_service = RepositoryService()
         self.excel_service = ExcelService()
-        self.review_chain = ReviewChain(self.llm)
+        # When set, results are queued for a background writer instead of
+        # being written to GCS inline
+        self.excel_writer = excel_writer
+        self.review_cache_dir = Path(settings.review_cache_dir)
         self.workflow = self._create_workflow()
 
     def _create_workflow(self) -> StateGraph:
         """Create the review workflow graph."""
         workflow = StateGraph(ReviewState)
         workflow.add_node("get_code", self._get_student_code)
+        workflow.add_node("check_cache", self._check_review_cache)
         workflow.add_node("analyze_code", self._analyze_code)
         workflow.add_node("review_code", self._review_code)
         workflow.add_node("save_results", self._save_results)
@@ -50,7 +65,11 @@ class HomeworkReviewAgent:
         workflow.set_entry_point("get_code")
         workflow.add_conditional_edges(
             "get_code",
-            lambda state: "handle_error" if state.get("error_message") else "analyze_code",
+            lambda state: "handle_error" if state.get("error_message") else "check_cache",
+        )
+        workflow.add_conditional_edges(
+            "check_cache",
+            lambda state: "save_results" if state.get("cached") else "analyze_code",
         )
         workflow.add_edge("analyze_code", "review_code")
         workflow.add_edge("review_code", "save_results")
@@ -58,19 +77,26 @@ class HomeworkReviewAgent:
         workflow.add_edge("handle_error", END)
         return workflow.compile()
 
-    def _get_student_code(self, state: ReviewState) -> ReviewState:
+    async def _get_student_code(self, state: ReviewState) -> ReviewState:
+        # Clone and file reads block, so run them off the event loop
         try:
-            repo_path = self.repo_service.get_homework_from_github(
+            repo_path = await asyncio.to_thread(
+                self.repo_service.get_homework_from_github,
                 state["username"], state["lecture_number"]
             )
             # Find all task folders in the cloned repo
-            tasks = [d for d in repo_path.iterdir() if d.is_dir() and d.name.startswith("task_")]
+            tasks = await asyncio.to_thread(
+                self.repo_service.get_lecture_tasks, state["lecture_number"], repo_path
+            )
             
             all_code = {}
-            for task_path in tasks:
-                task_code = self.repo_service.read_code_from_path(task_path)
-                for fname, code in task_code.items():
-                    all_code[f"{task_path.name}/{fname}"] = code
+            for task_name in tasks:
+                task_path = repo_path / task_name
+                task_code = await asyncio.to_thread(self.repo_service.read_code_from_path, task_path)
+                if task_code:
+                    all_code[task_name] = {
+                        f"{task_name}/{fname}": code for fname, code in task_code.items()
+                    }
 
             if not all_code:
                 state["error_message"] = f"No code found for student {state['username']}"
@@ -81,31 +107,96 @@ class HomeworkReviewAgent:
             state["error_message"] = f"Error retrieving code: {str(e)}"
             return state
 
-    def _analyze_code(self, state: ReviewState) -> ReviewState:
-        from ..services import CodeAnalysisService
-        analysis_service = CodeAnalysisService()
-        code_metrics = analysis_service.get_code_summary(state["code_content"])
-        state["code_metrics"] = code_metrics
+    def _check_review_cache(self, state: ReviewState) -> ReviewState:
+        """Reuse a stored review when the student's code has not changed."""
+        digest = hashlib.sha256()
+        digest.update(f"{state['username']}:{state['lecture_number']}:".encode())
+        digest.update(f"{settings.gemini_model}:{REVIEW_PROMPT_VERSION}".encode())
+        for task_name in sorted(state["code_content"]):
+            task_code = state["code_content"][task_name]
+            for file_path in sorted(task_code):
+                digest.update(b"\0" + file_path.encode() + b"\0")
+                digest.update(task_code[file_path].encode())
+        state["cache_key"] = digest.hexdigest()
+
+        cache_file = self.review_cache_dir / f"{state['cache_key']}.json"
+        try:
+            with open(cache_file, 'rb') as f:
+                expired = time.time() - os.fstat(f.fileno()).st_mtime > settings.review_cache_max_age_seconds
+                if not expired:
+                    state["review_result"] = orjson.loads(f.read())
+            if expired:
+                cache_file.unlink(missing_ok=True)
+            else:
+                state["cached"] = True
+                logger.info(f"Using cached review for {state['username']}, lecture {state['lecture_number']}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable review cache entry {cache_file}: {e}")
         return state
 
-    def _review_code(self, state: ReviewState) -> ReviewState:
-        tasks_with_code = defaultdict(dict)
-        for file_path, content in state["code_content"].items():
-            task_name = file_path.split('/')[0]
-            tasks_with_code[task_name][file_path] = content
+    def _store_review_cache(self, state: ReviewState) -> None:
+        """Atomically persist a successful review result under its content hash."""
+        review_result = state["review_result"]
+        if any("error" in task_res for task_res in review_result.get("task_results", [])):
+            return
 
-        review_results = []
-        for task_name, task_code in tasks_with_code.items():
-            task_result = self.review_chain.review_student_task(
-                state["username"], state["lecture_number"], task_name, task_code
-            )
-            review_results.append(task_result)
+        try:
+            self.review_cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.review_cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(review_result))
+            os.replace(tmp_path, self.review_cache_dir / f"{state['cache_key']}.json")
+            self._prune_review_cache()
+        except Exception as e:
+            logger.warning(f"Failed to write review cache entry: {e}")
 
-        avg_score = sum(r.get('score', 0) for r in review_results) / len(review_results) if review_results else 0
+    def _prune_review_cache(self) -> None:
+        """Drop expired cache entries, then the oldest beyond review_cache_max_entries."""
+        cutoff = time.time() - settings.review_cache_max_age_seconds
+        entries = []
+        with os.scandir(self.review_cache_dir) as it:
+            for entry in it:
+                try:
+                    mtime = entry.stat().st_mtime
+                    # Expired entries and temp files orphaned by a failed write
+                    if mtime < cutoff:
+                        os.unlink(entry.path)
+                    elif entry.name.endswith(".json"):
+                        entries.append((mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+
+        excess = len(entries) - settings.review_cache_max_entries
+        if excess > 0:
+            entries.sort()
+            for _, path in entries[:excess]:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    async def _analyze_code(self, state: ReviewState) -> ReviewState:
+        # A ChainMap gives the analyzer one flat view over all tasks without copying
+        code_metrics = await asyncio.to_thread(
+            _analysis_service.get_code_summary_cached, ChainMap(*state["code_content"].values())
+        )
+        state["code_metrics"] = code_metrics
+        return state
+
+    async def _review_code(self, state: ReviewState) -> ReviewState:
+        # All of the student's tasks go to the model as one batched call,
+        # bounded by settings.max_concurrent_reviews; results keep task order
+        review_results = await self.review_chain.abatch_review_tasks(
+            state["username"], state["lecture_number"], state["code_content"]
+        )
+
+        avg_score = statistics.fmean([r.get('score', 0) for r in review_results]) if review_results else 0
         state["review_result"] = {"average_score": avg_score, "task_results": review_results}
         return state
 
-    def _save_results(self, state: ReviewState) -> ReviewState:
+    async def _save_results(self, state: ReviewState) -> ReviewState:
         review_result = state["review_result"]
         task_reviews = []
         for task_res in review_result.get("task_results", []):
@@ -126,7 +217,13 @@ class HomeworkReviewAgent:
             total_tasks=len(task_reviews),
             details=task_reviews
         )
-        self.excel_service.update_student_review(state["lecture_number"], response)
+        if self.excel_writer is not None:
+            await self.excel_writer.put(state["lecture_number"], response)
+        else:
+            await asyncio.to_thread(self.excel_service.update_student_review, state["lecture_number"], response)
+        if state.get("cache_key") and not state.get("cached"):
+            # Writing and pruning the cache touch the disk, so keep them off the loop
+            await asyncio.to_thread(self._store_review_cache, state)
         state["final_response"] = response
         return state
 
@@ -151,8 +248,89 @@ class HomeworkReviewAgent:
             error_message=None,
             code_content={},
             code_metrics={},
+            cache_key=None,
+            cached=False,
             review_result=None,
             final_response=None
         )
         result = await self.workflow.ainvoke(initial_state)
-        return result["final_response"]
\ No newline at end of file
+        return result["final_response"]
+
+    async def astream_review(self, username: str, lecture_number: int) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Review a student's tasks concurrently, yielding (event, data) pairs.
+
+        Emits "partial" events with the review fields parsed so far, a
+        "result" event per finished task and a final "done" event carrying
+        the ReviewResponse. Results are saved exactly as in review_student.
+        """
+        state = ReviewState(
+            username=username,
+            lecture_number=lecture_number,
+            task=None,
+            current_step="start",
+            error_message=None,
+            code_content={},
+            code_metrics={},
+            cache_key=None,
+            cached=False,
+            review_result=None,
+            final_response=None
+        )
+        state = await self._get_student_code(state)
+        if state.get("error_message"):
+            state = self._handle_error(state)
+            yield "error", {"detail": state["error_message"]}
+            yield "done", state["final_response"].model_dump(mode="json")
+            return
+
+        # The cache lookup hashes the code and reads from disk
+        state = await asyncio.to_thread(self._check_review_cache, state)
+        if state.get("cached"):
+            for task_res in state["review_result"].get("task_results", []):
+                yield "result", task_res
+        else:
+            # Tasks are reviewed concurrently, as in review_student; their
+            # events are merged through a queue as they arrive
+            tasks = list(state["code_content"].items())
+            task_results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+            events: "asyncio.Queue[Tuple[int, Optional[str], Any]]" = asyncio.Queue()
+            semaphore = asyncio.Semaphore(settings.max_concurrent_reviews)
+
+            async def stream_task(index: int, task_name: str, task_code: Dict[str, str]) -> None:
+                try:
+                    async with semaphore:
+                        async for event, data in self.review_chain.astream_student_task(
+                            username, lecture_number, task_name, task_code
+                        ):
+                            events.put_nowait((index, event, data))
+                finally:
+                    # None marks this task's stream as finished
+                    events.put_nowait((index, None, None))
+
+            producers = [
+                asyncio.create_task(stream_task(index, task_name, task_code))
+                for index, (task_name, task_code) in enumerate(tasks)
+            ]
+            try:
+                remaining = len(producers)
+                while remaining:
+                    index, event, data = await events.get()
+                    if event is None:
+                        remaining -= 1
+                        continue
+                    if event == "result":
+                        task_results[index] = data
+                    yield event, data
+            finally:
+                # Stop outstanding reviews if the client goes away mid-stream
+                for producer in producers:
+                    producer.cancel()
+
+            # Results keep task order, like the batched review
+            review_results = [result for result in task_results if result is not None]
+            avg_score = statistics.fmean([r.get('score', 0) for r in review_results]) if review_results else 0
+            state["review_result"] = {"average_score": avg_score, "task_results": review_results}
+
+        state = await self._save_results(state)
+        yield "done", state["final_response"].model_dump(mode="json")
@@ -1,19 +1,29 @@
 """
 FastAPI endpoints for homework review API.
 """
+import asyncio
+import statistics
+import tempfile
+from pathlib import Path
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Depends
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from datetime import datetime
 
-from ..core import logger
+from ..core import Settings, get_settings, iso_now, logger
 from ..models.schemas import (
     ReviewRequest,
     ReviewResponse,
+    LectureReviewRequest,
+    LectureReviewResponse,
     HealthResponse
 )
 # The unused LectureReviewAgent is now removed from the import
 from ..agents import HomeworkReviewAgent
 from ..services import RepositoryService, ExcelService
+from ..services.excel import XLSX_CONTENT_TYPE
 
 
 # Create router
@@ -26,26 +36,40 @@ def get_repo_service() -> RepositoryService:
 def get_excel_service() -> ExcelService:
     return ExcelService()
 
+def get_review_agent(request: Request) -> HomeworkReviewAgent:
+    # Built on first use and shared, so the LLM client and compiled graph are reused
+    state = request.app.state
+    if getattr(state, "review_agent", None) is None:
+        state.review_agent = HomeworkReviewAgent(excel_writer=getattr(state, "excel_writer", None))
+    return state.review_agent
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
     return HealthResponse(
         status="healthy",
         version="1.0.0",
-        timestamp=datetime.now().isoformat()
+        timestamp=iso_now()
     )
 
 
+@router.get("/cache/stats")
+async def cache_stats(review_agent: HomeworkReviewAgent = Depends(get_review_agent)):
+    """LLM response cache statistics."""
+    return review_agent.review_chain.cache.stats
+
+
 @router.post("/review/student", response_model=ReviewResponse)
-async def review_student(request: ReviewRequest):
+async def review_student(
+    request: ReviewRequest,
+    review_agent: HomeworkReviewAgent = Depends(get_review_agent)
+):
     """
     Review a specific student's homework submission from their GitHub repository.
     """
     try:
         logger.info(f"Starting GitHub review for user {request.username}, lecture {request.lecture_number}")
 
-        review_agent = HomeworkReviewAgent()
-
         start_time = datetime.now()
         result = await review_agent.review_student(
             username=request.username,
@@ -64,6 +88,96 @@ async def review_student(request: ReviewRequest):
         raise HTTPException(status_code=500, detail=f"GitHub review failed: {str(e)}")
 
 
+
+@router.post("/review/student/stream")
+async def review_student_stream(
+    request: ReviewRequest,
+    review_agent: HomeworkReviewAgent = Depends(get_review_agent)
+):
+    """
+    Review a student's homework, streaming progress as Server-Sent Events.
+
+    Partial review fields are sent as soon as the model emits them, followed
+    by one "result" event per task and a final "done" event with the
+    ReviewResponse.
+    """
+    logger.info(f"Starting streamed GitHub review for user {request.username}, lecture {request.lecture_number}")
+
+    async def stream_events():
+        try:
+            async for event, data in review_agent.astream_review(request.username, request.lecture_number):
+                yield f"event: {event}\ndata: {orjson.dumps(data, default=str).decode()}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming review for GitHub student {request.username}: {e}")
+            yield f"event: error\ndata: {orjson.dumps({'detail': str(e)}).decode()}\n\n"
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+@router.post("/review/lecture")
+async def review_lecture(
+    request: LectureReviewRequest,
+    review_agent: HomeworkReviewAgent = Depends(get_review_agent),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Review several students' submissions for a lecture concurrently.
+
+    Results are streamed as NDJSON: one ReviewResponse per line in completion
+    order, or a {"username", "error"} line for a student whose review failed,
+    followed by a LectureReviewResponse summary line without the per-student
+    results.
+    """
+    if not request.usernames:
+        raise HTTPException(status_code=400, detail="A list of usernames to review is required")
+
+    logger.info(f"Starting lecture {request.lecture_number} review for {len(request.usernames)} students")
+
+    semaphore = asyncio.Semaphore(settings.max_concurrent_reviews)
+
+    async def review_one(username: str):
+        async with semaphore:
+            try:
+                return username, await review_agent.review_student(
+                    username=username,
+                    lecture_number=request.lecture_number
+                )
+            except Exception as e:
+                return username, e
+
+    async def stream_results():
+        start_time = datetime.now()
+        tasks = [asyncio.create_task(review_one(username)) for username in request.usernames]
+        scores = []
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                username, outcome = await next_result
+                if isinstance(outcome, Exception):
+                    logger.error(f"Error reviewing GitHub student {username}: {outcome}")
+                    yield orjson.dumps({"username": username, "error": str(outcome)}).decode() + "\n"
+                elif outcome:
+                    scores.append(outcome.average_score)
+                    yield outcome.model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        processing_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Completed lecture {request.lecture_number} review in {processing_time:.2f}s")
+
+        summary = LectureReviewResponse(
+            lecture_number=request.lecture_number,
+            total_students=len(scores),
+            requested_students=len(request.usernames),
+            succeeded_students=len(scores),
+            average_score=statistics.fmean(scores) if scores else 0,
+            student_results=[],
+            processing_time=processing_time
+        )
+        yield summary.model_dump_json(exclude={"student_results"}) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @router.get("/results/{lecture_number}")
 async def get_results(
     lecture_number: int,
@@ -74,7 +188,8 @@ async def get_results(
     Get review results for a specific lecture.
     """
     try:
-        results_df = excel_service.get_student_reviews(lecture_number, student_surname)
+        # The GCS listing and Parquet scan block, so keep them off the event loop
+        results_df = await asyncio.to_thread(excel_service.get_student_reviews, lecture_number, student_surname)
         
         if results_df.empty:
             return {"message": "No results found"}
@@ -83,4 +198,49 @@ async def get_results(
         
     except Exception as e:
         logger.error(f"Error getting results for lecture {lecture_number}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get results: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get results: {str(e)}")
+
+
+@router.get("/results/{lecture_number}/csv")
+async def export_results_csv(
+    lecture_number: int,
+    excel_service: ExcelService = Depends(get_excel_service)
+):
+    """
+    Export review results for a specific lecture as a CSV file.
+    """
+    # A file per request, so concurrent exports of a lecture don't collide;
+    # it is deleted once the response has been sent
+    with tempfile.NamedTemporaryFile(prefix=f"lecture_{lecture_number}_", suffix=".csv", delete=False) as tmp:
+        output_path = Path(tmp.name)
+
+    # GCS reads and pandas block, so keep them off the event loop
+    if not await asyncio.to_thread(excel_service.export_to_csv, lecture_number, output_path):
+        output_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=404, detail=f"No results found for lecture {lecture_number}")
+
+    return FileResponse(
+        output_path,
+        media_type="text/csv",
+        filename=f"lecture_{lecture_number}_reviews.csv",
+        background=BackgroundTask(output_path.unlink, missing_ok=True)
+    )
+
+
+@router.get("/results/{lecture_number}/xlsx")
+async def export_results_xlsx(
+    lecture_number: int,
+    excel_service: ExcelService = Depends(get_excel_service)
+):
+    """
+    Export review results for a specific lecture as an Excel workbook.
+    """
+    content = await asyncio.to_thread(excel_service.export_lecture, lecture_number)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"No results found for lecture {lecture_number}")
+
+    return Response(
+        content=content,
+        media_type=XLSX_CONTENT_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="lecture_{lecture_number}_reviews.xlsx"'}
+    )
@@ -8,6 +8,7 @@ from .prompts import (
     code_analysis_prompt,
     lecture_summary_prompt,
     quick_review_prompt,
+    review_output_parser,
     review_prompt,
     task_specific_prompt,
 )
@@ -27,6 +28,7 @@ __all__ = [
     "code_analysis_prompt", 
     "lecture_summary_prompt",
     "quick_review_prompt",
+    "review_output_parser",
     "review_prompt",
     "task_specific_prompt",
     "CodeAnalysisTool",
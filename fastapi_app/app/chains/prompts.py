@@ -1,9 +1,10 @@
 """
 LangChain prompt templates for homework review.
 """
-from langchain.prompts import PromptTemplate
+from langchain.prompts import ChatPromptTemplate, PromptTemplate
 from langchain.schema import BaseOutputParser
 from pydantic import BaseModel, Field
+from typing import Any, Dict
 import re
 
 
@@ -17,6 +18,23 @@ class ReviewCriteria(BaseModel):
     comments: str = Field(description="Detailed review comments")
 
 
+# Output parsing patterns, compiled once at import
+_TECHNICAL_CORRECTNESS_RE = re.compile(r"Technical Correctness:\s*(\d+)", re.IGNORECASE)
+_CODE_STYLE_RE = re.compile(r"Code Style:\s*(\d+)", re.IGNORECASE)
+_DOCUMENTATION_RE = re.compile(r"Documentation:\s*(\d+)", re.IGNORECASE)
+_PERFORMANCE_RE = re.compile(r"Performance:\s*(\d+)", re.IGNORECASE)
+_OVERALL_SCORE_RE = re.compile(r"Overall Score:\s*(\d+)", re.IGNORECASE)
+_COMMENTS_RE = re.compile(r"Comments:\s*(.*)", re.IGNORECASE | re.DOTALL)
+
+_SCORE_PATTERNS = (
+    ("technical_correctness", _TECHNICAL_CORRECTNESS_RE),
+    ("code_style", _CODE_STYLE_RE),
+    ("documentation", _DOCUMENTATION_RE),
+    ("performance", _PERFORMANCE_RE),
+    ("overall_score", _OVERALL_SCORE_RE),
+)
+
+
 class ReviewOutputParser(BaseOutputParser[ReviewCriteria]):
     """Parser for review output."""
     
@@ -24,11 +42,11 @@ class ReviewOutputParser(BaseOutputParser[ReviewCriteria]):
         """Parse the review output into structured format."""
         
         # Use regex to find scores, ignoring case and leading/trailing whitespace
-        technical_correctness_match = re.search(r"Technical Correctness:\s*(\d+)", text, re.IGNORECASE)
-        code_style_match = re.search(r"Code Style:\s*(\d+)", text, re.IGNORECASE)
-        documentation_match = re.search(r"Documentation:\s*(\d+)", text, re.IGNORECASE)
-        performance_match = re.search(r"Performance:\s*(\d+)", text, re.IGNORECASE)
-        overall_score_match = re.search(r"Overall Score:\s*(\d+)", text, re.IGNORECASE)
+        technical_correctness_match = _TECHNICAL_CORRECTNESS_RE.search(text)
+        code_style_match = _CODE_STYLE_RE.search(text)
+        documentation_match = _DOCUMENTATION_RE.search(text)
+        performance_match = _PERFORMANCE_RE.search(text)
+        overall_score_match = _OVERALL_SCORE_RE.search(text)
         
         # Extract scores, with a default of 0 if not found
         technical_correctness = int(technical_correctness_match.group(1)) if technical_correctness_match else 0
@@ -38,7 +56,7 @@ class ReviewOutputParser(BaseOutputParser[ReviewCriteria]):
         overall_score = int(overall_score_match.group(1)) if overall_score_match else 0
         
         # Extract comments
-        comments_match = re.search(r"Comments:\s*(.*)", text, re.IGNORECASE | re.DOTALL)
+        comments_match = _COMMENTS_RE.search(text)
         comments = comments_match.group(1).strip() if comments_match else "No comments provided."
         
         return ReviewCriteria(
@@ -50,23 +68,37 @@ class ReviewOutputParser(BaseOutputParser[ReviewCriteria]):
             comments=comments
         )
 
+    def parse_partial(self, text: str) -> Dict[str, Any]:
+        """
+        Parse the fields completed so far in a partially streamed review.
 
-# Main review prompt template
-REVIEW_PROMPT_TEMPLATE = """
-You are an expert code reviewer tasked with evaluating student homework submissions. 
-Your role is to provide constructive feedback and accurate scoring based on multiple criteria.
+        A score is only reported once a character follows its digits, so a
+        value that is still being generated is never returned truncated.
+        """
+        fields: Dict[str, Any] = {}
+        for name, pattern in _SCORE_PATTERNS:
+            match = pattern.search(text)
+            if match and match.end() < len(text):
+                fields[name] = int(match.group(1))
 
-**Task Information:**
-- Student: {student_surname}
-- Lecture: {lecture_number}
-- Task: {task_name}
-- Task Description: {task_description}
+        comments_match = _COMMENTS_RE.search(text)
+        if comments_match:
+            fields["comments"] = comments_match.group(1).strip()
+        return fields
 
-**Code to Review:**
-{code_content}
 
-**Code Metrics:**
-{code_metrics}
+# Shared parser instance; the parser is stateless
+review_output_parser = ReviewOutputParser()
+
+
+# Bump whenever the review prompt changes so cached reviews are invalidated
+REVIEW_PROMPT_VERSION = "3"
+
+# Main review prompt. The static rubric is sent as the system instruction and
+# only the per-submission fields vary, so requests share a cacheable prefix.
+REVIEW_SYSTEM_PROMPT = """
+You are an expert code reviewer tasked with evaluating student homework submissions. 
+Your role is to provide constructive feedback and accurate scoring based on multiple criteria.
 
 **Review Criteria:**
 
@@ -114,18 +146,27 @@ Comments:
 Remember to be constructive and educational in your feedback. Focus on helping the student learn and improve.
 """
 
+REVIEW_HUMAN_TEMPLATE = """
+**Task Information:**
+- Student: {student_surname}
+- Lecture: {lecture_number}
+- Task: {task_name}
+- Task Description: {task_description}
+
+**Code Metrics:**
+{code_metrics}
+
+**Code to Review:**
+{code_content}
+"""
+
+REVIEW_PROMPT_TEMPLATE = REVIEW_SYSTEM_PROMPT + REVIEW_HUMAN_TEMPLATE
+
 # Create the prompt template
-review_prompt = PromptTemplate(
-    input_variables=[
-        "student_surname",
-        "lecture_number", 
-        "task_name",
-        "task_description",
-        "code_content",
-        "code_metrics"
-    ],
-    template=REVIEW_PROMPT_TEMPLATE
-)
+review_prompt = ChatPromptTemplate.from_messages([
+    ("system", REVIEW_SYSTEM_PROMPT),
+    ("human", REVIEW_HUMAN_TEMPLATE),
+])
 
 # Simplified review prompt for quick reviews
 QUICK_REVIEW_PROMPT_TEMPLATE = """
@@ -1,100 +1,298 @@
-from typing import Dict, Any, Optional
+import asyncio
+from collections import defaultdict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+
+import numpy as np
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.output_parsers import StrOutputParser
 
-from ..core import logger, settings
-from ..services import CodeAnalysisService
+from ..core import logger, settings, LLMCache, MemoryBackend
+from ..services import CodeAnalysisService, SemanticCache, create_semantic_cache
 from .prompts import (
+    ReviewCriteria,
     review_prompt,
-    ReviewOutputParser
+    review_output_parser
 )
 
 
+# Parsed once by str.format_map; missing metrics default to 0
+_METRICS_TEMPLATE = """
+Code Metrics Summary:
+- Total Files: {total_files}
+- Lines of Code: {total_lines_of_code}
+- Lines of Comments: {total_lines_of_comments}
+- Functions: {total_functions}
+- Classes: {total_classes}
+- Average Complexity: {average_complexity:.1f}
+- Docstring Coverage: {average_docstring_coverage:.1f}%
+- Naming Convention Score: {average_naming_convention_score:.1f}%
+"""
+
+# Files with little review value, left out first when a prompt is over budget
+_LOW_SIGNAL_SUFFIXES = (".lock", ".min.js", ".min.css", ".map")
+
+
+@lru_cache(maxsize=4)
+def _build_llm(model: str, temperature: float) -> ChatGoogleGenerativeAI:
+    """Create the Gemini client for a model/temperature pair once per process."""
+    return ChatGoogleGenerativeAI(
+        google_api_key=settings.google_api_key,
+        model=model,
+        temperature=temperature
+    )
+
+
+@lru_cache(maxsize=4)
+def _build_chain(model: str, temperature: float):
+    """Compose the review runnable once per model/temperature pair."""
+    return review_prompt | _build_llm(model, temperature) | StrOutputParser() | review_output_parser
+
+
+@lru_cache(maxsize=4)
+def _build_stream_chain(model: str, temperature: float):
+    """Compose the review runnable that streams raw text for incremental parsing."""
+    return review_prompt | _build_llm(model, temperature) | StrOutputParser()
+
+
 class ReviewChain:
     """Main chain for homework review process."""
 
     def __init__(self, llm: Optional[ChatGoogleGenerativeAI] = None):
-        self.llm = llm or ChatGoogleGenerativeAI(
-            google_api_key=settings.google_api_key,
-            model=settings.gemini_model,
-            temperature=0.1,
-            convert_system_message_to_human=True
-        )
+        self.llm = llm or _build_llm(settings.gemini_model, 0.1)
         self.code_analysis_service = CodeAnalysisService()
-        self.output_parser = ReviewOutputParser()
+        self.output_parser = review_output_parser
+        self.cache = LLMCache(
+            MemoryBackend(maxsize=settings.llm_cache_maxsize),
+            ttl_seconds=settings.llm_cache_ttl_seconds
+        )
+        self.semantic_cache = (
+            create_semantic_cache(settings.semantic_cache_threshold)
+            if settings.semantic_cache_enabled else None
+        )
 
-        # Create chains
-        self.review_chain = review_prompt | self.llm | StrOutputParser() | self.output_parser
+        # Create chains; the default LLM shares the prebuilt runnable
+        if llm is None:
+            self.review_chain = _build_chain(settings.gemini_model, 0.1)
+            self.stream_chain = _build_stream_chain(settings.gemini_model, 0.1)
+        else:
+            self.review_chain = review_prompt | self.llm | StrOutputParser() | self.output_parser
+            self.stream_chain = review_prompt | self.llm | StrOutputParser()
 
-    def review_student_task(
+    async def abatch_review_tasks(
+        self,
+        student_surname: str,
+        lecture_number: int,
+        tasks: Dict[str, Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Review several tasks, sending every cache miss through one batched
+        chain call. Results are returned in the order of ``tasks``.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        pending = []
+        for index, (task, code_content) in enumerate(tasks.items()):
+            if not code_content:
+                results[index] = self._no_submission_result(student_surname, task)
+                continue
+            try:
+                code_summary, chain_input = await self._prepare_review(
+                    student_surname, lecture_number, task, code_content, None
+                )
+                cache_key, vector, cached = await self._lookup_caches(task, code_content, code_summary, chain_input)
+            except Exception as e:
+                logger.error(f"Error reviewing student task: {e}")
+                results[index] = self._error_result(task, e)
+                continue
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, task, code_summary, chain_input, cache_key, vector))
+
+        if pending:
+            review_results = await self.review_chain.abatch(
+                [chain_input for _, _, _, chain_input, _, _ in pending],
+                config={"max_concurrency": settings.max_concurrent_reviews},
+                return_exceptions=True
+            )
+            for (index, task, code_summary, _, cache_key, vector), review_result in zip(pending, review_results):
+                if isinstance(review_result, Exception):
+                    logger.error(f"Error reviewing student task: {review_result}")
+                    results[index] = self._error_result(task, review_result)
+                else:
+                    results[index] = self._store_result(
+                        cache_key, vector, self._build_result(task, review_result, code_summary)
+                    )
+        return results
+
+    async def astream_student_task(
         self,
         student_surname: str,
         lecture_number: int,
         task: str,
         code_content: Dict[str, str],
         task_description: Optional[str] = None
-    ) -> Dict[str, Any]:
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
         """
-        Review a specific student's task submission using the provided code.
+        Stream a task review as ("partial", fields) events while the model is
+        generating, followed by one ("result", result) event.
         """
         try:
             if not code_content:
-                return {
-                    "error": f"No code found for student {student_surname} in task {task}",
-                    "score": 0,
-                    "comments": "No submission found"
-                }
-
-            code_summary = self.code_analysis_service.get_code_summary(code_content)
-
-            chain_input = {
-                "student_surname": student_surname,
-                "lecture_number": lecture_number,
-                "task_name": task,
-                "task_description": task_description or f"Task {task}",
-                "code_content": self._format_code_content(code_content),
-                "code_metrics": self._format_code_metrics(code_summary)
-            }
-
-            review_result = self.review_chain.invoke(chain_input)
-
-            return {
-                "task": task,
-                "score": review_result.overall_score,
-                "comments": review_result.comments,
-                "technical_correctness": review_result.technical_correctness,
-                "code_style": review_result.code_style,
-                "documentation": review_result.documentation,
-                "performance": review_result.performance,
-                "code_metrics": code_summary
-            }
+                yield "result", self._no_submission_result(student_surname, task)
+                return
+
+            code_summary, chain_input = await self._prepare_review(
+                student_surname, lecture_number, task, code_content, task_description
+            )
+
+            cache_key, vector, cached = await self._lookup_caches(task, code_content, code_summary, chain_input)
+            if cached is not None:
+                yield "result", cached
+                return
+
+            accumulated = ""
+            last_fields: Dict[str, Any] = {}
+            async for chunk in self.stream_chain.astream(chain_input):
+                accumulated += chunk
+                fields = self.output_parser.parse_partial(accumulated)
+                if fields != last_fields:
+                    last_fields = fields
+                    yield "partial", {"task": task, **fields}
+
+            result = self._build_result(task, self.output_parser.parse(accumulated), code_summary)
+            yield "result", self._store_result(cache_key, vector, result)
 
         except Exception as e:
-            logger.error(f"Error reviewing student task: {e}")
-            return {
-                "error": str(e),
-                "task": task,
-                "score": 0,
-                "comments": f"Error during review: {str(e)}"
-            }
+            logger.error(f"Error streaming student task review: {e}")
+            yield "result", self._error_result(task, e)
+
+    async def _prepare_review(
+        self,
+        student_surname: str,
+        lecture_number: int,
+        task: str,
+        code_content: Dict[str, str],
+        task_description: Optional[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Analyze the code and build the prompt input for a task review."""
+        code_summary = await asyncio.to_thread(self.code_analysis_service.get_code_summary_cached, code_content)
+
+        chain_input = {
+            "student_surname": student_surname,
+            "lecture_number": lecture_number,
+            "task_name": task,
+            "task_description": task_description or f"Task {task}",
+            "code_content": self._format_code_content(code_content),
+            "code_metrics": self._format_code_metrics(code_summary)
+        }
+        return code_summary, chain_input
+
+    async def _lookup_caches(
+        self,
+        task: str,
+        code_content: Dict[str, str],
+        code_summary: Dict[str, Any],
+        chain_input: Dict[str, Any]
+    ) -> Tuple[str, Optional[np.ndarray], Optional[Dict[str, Any]]]:
+        """
+        Check the exact and semantic caches for a prepared review.
+
+        Returns the exact cache key, the submission embedding (when the
+        semantic cache is enabled) and the cached result, if any.
+        """
+        cache_key = LLMCache.make_key(model=settings.gemini_model, input=chain_input, temp=0.1)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cache_key, None, dict(cached)
+
+        vector = None
+        if self.semantic_cache is not None:
+            vector = await asyncio.to_thread(self.semantic_cache.embed, SemanticCache.fingerprint(
+                task, chain_input["task_description"], code_content
+            ))
+            similar = self.semantic_cache.get(vector)
+            if similar is not None:
+                result = {**similar, "task": task, "code_metrics": code_summary}
+                self.cache.set(cache_key, result)
+                return cache_key, vector, dict(result)
+        return cache_key, vector, None
+
+    def _store_result(self, cache_key: str, vector: Optional[np.ndarray], result: Dict[str, Any]) -> Dict[str, Any]:
+        self.cache.set(cache_key, result)
+        if vector is not None:
+            self.semantic_cache.set(vector, result)
+        return dict(result)
+
+    def _build_result(self, task: str, review_result: ReviewCriteria, code_summary: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "task": task,
+            "score": review_result.overall_score,
+            "comments": review_result.comments,
+            "technical_correctness": review_result.technical_correctness,
+            "code_style": review_result.code_style,
+            "documentation": review_result.documentation,
+            "performance": review_result.performance,
+            "code_metrics": code_summary
+        }
+
+    def _no_submission_result(self, student_surname: str, task: str) -> Dict[str, Any]:
+        return {
+            "error": f"No code found for student {student_surname} in task {task}",
+            "score": 0,
+            "comments": "No submission found"
+        }
+
+    def _error_result(self, task: str, error: Exception) -> Dict[str, Any]:
+        return {
+            "error": str(error),
+            "task": task,
+            "score": 0,
+            "comments": f"Error during review: {str(error)}"
+        }
 
     def _format_code_content(self, code_content: Dict[str, str]) -> str:
-        """Format code content for prompt."""
-        formatted = ""
+        """
+        Format code content for prompt.
+
+        Files over settings.max_prompt_file_bytes are cut down to their head
+        and tail. If the result still exceeds the prompt budget (about four
+        characters per token of settings.max_prompt_tokens), whole files are
+        left out, lock/minified files first and then the largest ones.
+        """
+        max_file_bytes = settings.max_prompt_file_bytes
+        blocks = {}
         for file_path, content in code_content.items():
-            formatted += f"=== {file_path} ===\n{content}\n\n"
-        return formatted
+            if len(content) > max_file_bytes:
+                blocks[file_path] = (
+                    f"=== {file_path} (truncated, {len(content)} characters) ===\n"
+                    f"{content[:max_file_bytes // 2]}\n...<omitted>...\n{content[-(max_file_bytes // 4):]}\n\n"
+                )
+            else:
+                blocks[file_path] = f"=== {file_path} ===\n{content}\n\n"
+
+        budget = settings.max_prompt_tokens * 4
+        total = sum(len(block) for block in blocks.values())
+        if total > budget:
+            drop_order = sorted(
+                blocks,
+                key=lambda file_path: (not file_path.endswith(_LOW_SIGNAL_SUFFIXES), -len(blocks[file_path]))
+            )
+            for file_path in drop_order:
+                if total <= budget:
+                    break
+                total -= len(blocks[file_path])
+                blocks[file_path] = f"=== {file_path} (omitted to fit the prompt budget) ===\n\n"
+                total += len(blocks[file_path])
+
+        return "".join(blocks.values())
 
     def _format_code_metrics(self, code_summary: Dict[str, Any]) -> str:
         """Format code metrics for prompt."""
-        return f"""
-Code Metrics Summary:
-- Total Files: {code_summary.get('total_files', 0)}
-- Lines of Code: {code_summary.get('total_lines_of_code', 0)}
-- Lines of Comments: {code_summary.get('total_lines_of_comments', 0)}
-- Functions: {code_summary.get('total_functions', 0)}
-- Classes: {code_summary.get('total_classes', 0)}
-- Average Complexity: {code_summary.get('average_complexity', 0):.1f}
-- Docstring Coverage: {code_summary.get('average_docstring_coverage', 0):.1f}%
-- Naming Convention Score: {code_summary.get('average_naming_convention_score', 0):.1f}%
-"""
\ No newline at end of file
+        return _METRICS_TEMPLATE.format_map(defaultdict(int, code_summary))
+
+
+@lru_cache(maxsize=1)
+def get_review_chain() -> ReviewChain:
+    """Shared ReviewChain, so its response caches span all callers."""
+    return ReviewChain()
@@ -31,6 +31,10 @@ class CodeAnalysisTool(BaseTool):
         try:
             from pathlib import Path
             metrics = self.analysis_service.analyze_code_file(Path(file_path), content)
+            if metrics.naming_convention_score is None:
+                naming_score = "not scored (file too large)"
+            else:
+                naming_score = f"{metrics.naming_convention_score:.1f}%"
             
             result = f"""
 Code Analysis Results for {file_path}:
@@ -40,7 +44,7 @@ Code Analysis Results for {file_path}:
 - Classes Count: {metrics.classes_count}
 - Complexity Score: {metrics.complexity_score}
 - Docstring Coverage: {metrics.docstring_coverage:.1f}%
-- Naming Convention Score: {metrics.naming_convention_score:.1f}%
+- Naming Convention Score: {naming_score}
 """
             return result
         except Exception as e:
@@ -122,11 +126,10 @@ class CodeReaderTool(BaseTool):
             if not code_content:
                 return f"No code found for student {student_surname} in lecture{lecture_number}_task_{task}"
             
-            result = f"Code submission for {student_surname} (lecture{lecture_number}_task_{task}):\n\n"
-            for file_path, content in code_content.items():
-                result += f"=== {file_path} ===\n{content}\n\n"
-            
-            return result
+            header = f"Code submission for {student_surname} (lecture{lecture_number}_task_{task}):\n\n"
+            return header + "".join(
+                f"=== {file_path} ===\n{content}\n\n" for file_path, content in code_content.items()
+            )
         except Exception as e:
             logger.error(f"Error reading code: {e}")
             return f"Error reading code: {str(e)}"
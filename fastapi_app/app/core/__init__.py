@@ -1,28 +1,37 @@
 """
 Core module initialization.
 """
-from .config import Settings, settings
+from .config import Settings, get_settings, settings
+from .clock import iso_now, run_clock
 from .logging import logger, setup_logging
+from .llm_cache import LLMCache, MemoryBackend
 from .utils import (
     async_retry,
     ensure_directory,
     format_duration,
     get_file_extension,
     is_code_file,
+    is_code_file_by_name,
     retry,
     sanitize_filename,
 )
 
 __all__ = [
     "Settings",
+    "get_settings",
     "settings",
+    "iso_now",
+    "run_clock",
     "logger",
     "setup_logging",
+    "LLMCache",
+    "MemoryBackend",
     "async_retry",
     "ensure_directory",
     "format_duration",
     "get_file_extension",
     "is_code_file",
+    "is_code_file_by_name",
     "retry",
     "sanitize_filename",
 ]
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Cached wall-clock timestamp for response payloads.
+"""
+import asyncio
+from datetime import datetime
+
+_iso_now = ""
+
+
+def iso_now() -> str:
+    """
+    Current local time as an ISO 8601 string.
+
+    While run_clock is active this is a cached value at most one refresh
+    interval old; otherwise it is computed on the spot.
+    """
+    return _iso_now or datetime.now().isoformat()
+
+
+async def run_clock(interval: float = 0.5) -> None:
+    """Refresh the cached timestamp every ``interval`` seconds until cancelled."""
+    global _iso_now
+    try:
+        while True:
+            _iso_now = datetime.now().isoformat()
+            await asyncio.sleep(interval)
+    finally:
+        _iso_now = ""
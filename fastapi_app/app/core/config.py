@@ -1,46 +1,67 @@
 """
 Core configuration and settings for the AI Homework Reviewer.
 """
+import os
+import tempfile
+from functools import lru_cache
 from typing import Optional
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
+    # Fields map to environment variables of the same name, case-insensitively
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
+
     # API Settings
     app_name: str = "AI Homework Reviewer"
     app_version: str = "1.0.0"
-    debug: bool = Field(default=False, env="DEBUG")
-    host: str = Field(default="0.0.0.0", env="HOST")
-    port: int = Field(default=8000, env="PORT")
+    debug: bool = False
+    host: str = "0.0.0.0"
+    port: int = 8000
+    warmup_services: bool = False
 
     # Google Gemini Settings
-    google_api_key: Optional[str] = Field(default=None, env="GOOGLE_API_KEY")
-    gemini_model: str = Field(default="gemini-1.5-pro", env="GEMINI_MODEL")
+    google_api_key: Optional[str] = None
+    gemini_model: str = "gemini-1.5-pro"
+    max_concurrent_reviews: int = 8
+    review_processes: int = 1
+    # Under the system temp dir, since the working directory is read-only on Cloud Functions
+    review_cache_dir: str = os.path.join(tempfile.gettempdir(), "homework_reviewer", "reviews")
+    review_cache_max_entries: int = 2000
+    review_cache_max_age_seconds: int = 30 * 24 * 3600
+    llm_cache_maxsize: int = 1024
+    llm_cache_ttl_seconds: int = 3600
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.87
+    max_prompt_file_bytes: int = 32768
+    max_prompt_tokens: int = 100000
 
     # GitHub Configuration
-    github_token: Optional[str] = Field(default=None, env="GITHUB_TOKEN")
+    github_token: Optional[str] = None
 
     # Google Cloud Configuration
-    gcp_project_id: Optional[str] = Field(default=None, env="GCP_PROJECT_ID")
-    gcs_bucket_name: Optional[str] = Field(default=None, env="GCS_BUCKET_NAME")
+    gcp_project_id: Optional[str] = None
+    gcs_bucket_name: Optional[str] = None
 
     # SMTP Email Configuration
-    smtp_host: Optional[str] = Field(default=None, env="SMTP_HOST")
-    smtp_port: int = Field(default=587, env="SMTP_PORT")
-    smtp_user: Optional[str] = Field(default=None, env="SMTP_USER")
-    smtp_password: Optional[str] = Field(default=None, env="SMTP_PASSWORD")
-    sender_email: Optional[str] = Field(default=None, env="SENDER_EMAIL")
-    recipient_email: Optional[str] = Field(default=None, env="RECIPIENT_EMAIL")
+    smtp_host: Optional[str] = None
+    smtp_port: int = 587
+    smtp_user: Optional[str] = None
+    smtp_password: Optional[str] = None
+    sender_email: Optional[str] = None
+    recipient_email: Optional[str] = None
 
     # Service Account for Signing URLs
-    service_account_email: Optional[str] = Field(default=None, env="SERVICE_ACCOUNT_EMAIL")
+    service_account_email: Optional[str] = None
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings, reading the environment only once."""
+    return Settings()
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
 
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Exact-match cache for LLM responses.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU store for cache entries."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Tuple[float, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LLMCache:
+    """
+    TTL cache in front of LLM calls, keyed by a hash of the exact request.
+    """
+
+    def __init__(self, backend: Optional[MemoryBackend] = None, ttl_seconds: float = 3600):
+        self.backend = backend or MemoryBackend()
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """
+        Build a cache key from JSON-serializable request parts.
+
+        Args:
+            **parts: Everything that influences the LLM response
+
+        Returns:
+            Hex SHA-256 digest of the canonical JSON encoding
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.backend.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if time.monotonic() - created_at < self.ttl_seconds:
+                self.hits += 1
+                return value
+            self.backend.delete(key)
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self.backend.set(key, (time.monotonic(), value))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.backend),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
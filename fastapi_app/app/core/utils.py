@@ -3,6 +3,7 @@ Core utilities and helpers for the AI Homework Reviewer.
 """
 import asyncio
 import functools
+import re
 import time
 from typing import Callable, TypeVar, Union
 from pathlib import Path
@@ -128,6 +129,15 @@ def get_file_extension(file_path: Union[str, Path]) -> str:
     return Path(file_path).suffix.lower()
 
 
+_CODE_EXTENSIONS = frozenset({
+    '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', 
+    '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.r', '.m',
+    '.sql', '.html', '.css', '.scss', '.sass', '.less', '.vue',
+    '.jsx', '.tsx', '.json', '.xml', '.yaml', '.yml', '.toml',
+    '.ini', '.cfg', '.conf', '.sh', '.bash', '.zsh', '.fish'
+})
+
+
 def is_code_file(file_path: Union[str, Path]) -> bool:
     """
     Check if a file is a code file based on its extension.
@@ -138,15 +148,24 @@ def is_code_file(file_path: Union[str, Path]) -> bool:
     Returns:
         True if the file is a code file
     """
-    code_extensions = {
-        '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', 
-        '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.r', '.m',
-        '.sql', '.html', '.css', '.scss', '.sass', '.less', '.vue',
-        '.jsx', '.tsx', '.json', '.xml', '.yaml', '.yml', '.toml',
-        '.ini', '.cfg', '.conf', '.sh', '.bash', '.zsh', '.fish'
-    }
+    return get_file_extension(file_path) in _CODE_EXTENSIONS
+
+
+def is_code_file_by_name(name: str) -> bool:
+    """
+    Check if a bare file name is a code file, without building a Path.
     
-    return get_file_extension(file_path) in code_extensions
+    Args:
+        name: File name (e.g. an os.walk or os.scandir entry name)
+        
+    Returns:
+        True if the file is a code file
+    """
+    i = name.rfind('.')
+    return i > 0 and name[i:].lower() in _CODE_EXTENSIONS
+
+
+_INVALID_FILENAME_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
 
 
 def sanitize_filename(filename: str) -> str:
@@ -159,10 +178,8 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanitized filename
     """
-    import re
-    
     # Replace invalid characters with underscores
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    sanitized = _INVALID_FILENAME_CHARS_RE.sub('_', filename)
     
     # Remove leading/trailing spaces and dots
     sanitized = sanitized.strip(' .')
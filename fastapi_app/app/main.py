@@ -2,16 +2,18 @@
 FastAPI main application entrypoint.
 """
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from contextlib import asynccontextmanager
+import asyncio
 import time
-from datetime import datetime
 
-from .core import logger, settings
+from .core import iso_now, logger, run_clock, settings
 # This is the crucial import for your API endpoints
 from .api import review_router
+from .agents import HomeworkReviewAgent
 from .models.schemas import ErrorResponse
+from .services import CodeAnalysisService, ExcelWriteQueue
 
 # Global variable to track startup time
 startup_time = None
@@ -22,16 +24,29 @@ async def lifespan(app: FastAPI):
     global startup_time
     startup_time = time.time()
     logger.info("Starting AI Homework Reviewer application...")
-    # Service initialization is now handled by dependency injection,
-    # so we don't need to do it here.
+    # Review results are written to Excel by a single background task so
+    # requests don't wait on the download/rewrite/upload cycle.
+    app.state.excel_writer = ExcelWriteQueue()
+    app.state.excel_writer.start()
+    if settings.warmup_services:
+        # Build the shared review agent now rather than on the first request
+        app.state.review_agent = await asyncio.to_thread(
+            HomeworkReviewAgent, excel_writer=app.state.excel_writer
+        )
+    # Responses read a cached timestamp instead of formatting the clock per request
+    clock_task = asyncio.create_task(run_clock())
     yield
     logger.info("Shutting down AI Homework Reviewer application...")
+    clock_task.cancel()
+    await app.state.excel_writer.stop()
+    await asyncio.to_thread(CodeAnalysisService.shutdown_executor)
 
 # Create FastAPI application
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description="AI-powered homework reviewing system.",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -45,7 +60,7 @@ app.include_router(
 )
 # ---------------------------------------------------
 
-@app.get("/", response_class=JSONResponse)
+@app.get("/")
 async def root():
     """Root endpoint with API information."""
     uptime = time.time() - startup_time if startup_time else 0
@@ -55,7 +70,7 @@ async def root():
         "version": settings.app_version,
         "status": "running",
         "uptime_seconds": uptime,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": iso_now(),
         "docs": "/docs"
     }
 
@@ -63,13 +78,13 @@ async def root():
 async def general_exception_handler(request, exc):
     """General exception handler."""
     logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Internal server error",
             detail=str(exc),
-            timestamp=datetime.now().isoformat()
-        ).dict()
+            timestamp=iso_now()
+        ).model_dump()
     )
 
 if __name__ == "__main__":
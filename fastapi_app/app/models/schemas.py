@@ -5,6 +5,8 @@ from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
+from ..core.clock import iso_now
+
 
 class ReviewRequest(BaseModel):
     """Request model for triggering a homework review from GitHub."""
@@ -51,6 +53,8 @@ class LectureReviewResponse(BaseModel):
     """Response model for lecture-wide review results."""
     lecture_number: int = Field(..., description="Reviewed lecture number")
     total_students: int = Field(..., ge=0, description="Total number of students reviewed")
+    requested_students: Optional[int] = Field(None, ge=0, description="Number of students requested for review")
+    succeeded_students: Optional[int] = Field(None, ge=0, description="Number of students reviewed without errors")
     average_score: float = Field(..., ge=0, le=100, description="Average score across all students")
     student_results: List[ReviewResponse] = Field(..., description="Results for each student")
     review_timestamp: datetime = Field(default_factory=datetime.now)
@@ -61,14 +65,14 @@ class ErrorResponse(BaseModel):
     """Error response model."""
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: str = Field(default_factory=iso_now)
 
 
 class HealthResponse(BaseModel):
     """Health check response model."""
     status: str = Field(..., description="Service status")
     version: str = Field(..., description="Application version")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: str = Field(default_factory=iso_now)
 
 
 class StudentInfo(BaseModel):
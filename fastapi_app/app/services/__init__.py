@@ -3,13 +3,20 @@ Services module initialization.
 """
 from .code_analysis import CodeAnalysisService, CodeMetrics
 from .excel import ExcelService
+from .excel_writer import ExcelWriteQueue
+from .gcs import get_storage_client
 from .repository_service import RepositoryService
 from .notification import NotificationService
+from .semantic_cache import SemanticCache, create_semantic_cache
 
 __all__ = [
     "CodeAnalysisService",
     "CodeMetrics",
     "ExcelService",
+    "ExcelWriteQueue",
+    "get_storage_client",
     "RepositoryService",
     "NotificationService",
+    "SemanticCache",
+    "create_semantic_cache",
 ]
@@ -2,13 +2,39 @@
 Code analysis service for extracting code metrics and information.
 """
 import ast
+import functools
+import hashlib
+import multiprocessing
+import os
 import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
 from ..core import logger
 
+# Complexity added per branching node type; ast.BoolOp is handled separately
+_CC_ADD = {
+    ast.If: 1,
+    ast.While: 1,
+    ast.For: 1,
+    ast.AsyncFor: 1,
+    ast.ExceptHandler: 1,
+}
+
+# get_code_summary switches to the process pool at this much source. Analysis
+# runs at roughly 1.2 us per byte and a warm pool adds 1-4 ms per batch, so
+# below ~32 KiB (~40 ms of work) two cores save too little to pay for the IPC
+PARALLEL_ANALYSIS_MIN_BYTES = 32 * 1024
+
+# get_code_summary_cached entries kept, and the largest submission it hashes
+SUMMARY_CACHE_MAXSIZE = 512
+SUMMARY_CACHE_MAX_BYTES = 1024 * 1024
+
 
 @dataclass
 class CodeMetrics:
@@ -19,13 +45,26 @@ class CodeMetrics:
     classes_count: int
     complexity_score: int
     docstring_coverage: float
-    naming_convention_score: float
+    # None when the file is too large to score (see max_naming_nodes)
+    naming_convention_score: Optional[float]
 
 
 class CodeAnalysisService:
     """Service for analyzing code quality and extracting metrics."""
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    # Guards creating, replacing and shutting down the shared pool, which
+    # happens from concurrent worker threads
+    _executor_lock = threading.Lock()
     
-    def __init__(self):
+    def __init__(self, max_naming_nodes: int = 50000):
+        # Files whose AST exceeds this many nodes (usually generated code)
+        # skip the naming convention pass.
+        self.max_naming_nodes = max_naming_nodes
+        self._var_re = re.compile(r'^[a-z_][a-z0-9_]*$')
+        self._class_re = re.compile(r'^[A-Z][A-Za-z0-9]*$')
+        self._summary_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._summary_cache_lock = threading.Lock()
         self.supported_languages = {
             '.py': self._analyze_python,
             '.js': self._analyze_javascript,
@@ -56,6 +95,9 @@ class CodeAnalysisService:
     
     def _analyze_python(self, content: str) -> CodeMetrics:
         """Analyze Python code."""
+        if not content.strip():
+            return CodeMetrics(0, 0, 0, 0, 1, 0.0, 0.0)
+
         try:
             tree = ast.parse(content)
         except SyntaxError:
@@ -66,17 +108,22 @@ class CodeAnalysisService:
         lines_of_code = len([line for line in lines if line.strip() and not line.strip().startswith('#')])
         lines_of_comments = len([line for line in lines if line.strip().startswith('#')])
         
-        functions_count = len([node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)])
-        classes_count = len([node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)])
+        nodes = list(ast.walk(tree))
+        functions_count = len([node for node in nodes if isinstance(node, ast.FunctionDef)])
+        classes_count = len([node for node in nodes if isinstance(node, ast.ClassDef)])
         
         # Calculate complexity (simplified)
-        complexity_score = self._calculate_python_complexity(tree)
+        complexity_score = self._calculate_python_complexity(nodes)
         
         # Calculate docstring coverage
         docstring_coverage = self._calculate_docstring_coverage(tree)
         
         # Calculate naming convention score
-        naming_score = self._calculate_python_naming_convention(tree)
+        # Large files are left unscored rather than counted as badly named
+        if len(nodes) > self.max_naming_nodes:
+            naming_score = None
+        else:
+            naming_score = self._calculate_python_naming_convention(tree)
         
         return CodeMetrics(
             lines_of_code=lines_of_code,
@@ -203,16 +250,16 @@ class CodeAnalysisService:
             naming_convention_score=0.0
         )
     
-    def _calculate_python_complexity(self, tree: ast.AST) -> int:
-        """Calculate cyclomatic complexity for Python code."""
+    def _calculate_python_complexity(self, nodes: List[ast.AST]) -> int:
+        """Calculate cyclomatic complexity from the walked nodes of a Python module."""
         complexity = 1  # Base complexity
         
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.If, ast.While, ast.For, ast.AsyncFor)):
-                complexity += 1
-            elif isinstance(node, ast.ExceptHandler):
-                complexity += 1
-            elif isinstance(node, ast.BoolOp):
+        for node in nodes:
+            node_type = type(node)
+            delta = _CC_ADD.get(node_type, 0)
+            if delta:
+                complexity += delta
+            elif node_type is ast.BoolOp:
                 complexity += len(node.values) - 1
         
         return complexity
@@ -235,40 +282,98 @@ class CodeAnalysisService:
     
     def _calculate_python_naming_convention(self, tree: ast.AST) -> float:
         """Calculate naming convention score for Python code."""
-        total_names = 0
-        correct_names = 0
-        
+        # Count occurrences so each distinct identifier is matched only once
+        names = Counter()
+        function_names = Counter()
+        class_names = Counter()
+
         for node in ast.walk(tree):
-            if isinstance(node, ast.Name):
-                total_names += 1
-                if self._is_valid_python_name(node.id):
-                    correct_names += 1
-            elif isinstance(node, ast.FunctionDef):
-                total_names += 1
-                if self._is_valid_python_function_name(node.name):
-                    correct_names += 1
-            elif isinstance(node, ast.ClassDef):
-                total_names += 1
-                if self._is_valid_python_class_name(node.name):
-                    correct_names += 1
-        
+            node_type = type(node)
+            if node_type is ast.Name:
+                names[node.id] += 1
+            elif node_type is ast.FunctionDef:
+                function_names[node.name] += 1
+            elif node_type is ast.ClassDef:
+                class_names[node.name] += 1
+
+        total_names = sum(names.values()) + sum(function_names.values()) + sum(class_names.values())
         if total_names == 0:
             return 0.0
-        
+
+        correct_names = (
+            sum(count for name, count in names.items() if self._is_valid_python_name(name))
+            + sum(count for name, count in function_names.items() if self._is_valid_python_function_name(name))
+            + sum(count for name, count in class_names.items() if self._is_valid_python_class_name(name))
+        )
+
         return (correct_names / total_names) * 100
     
     def _is_valid_python_name(self, name: str) -> bool:
         """Check if a Python name follows conventions."""
-        return name.islower() and '_' in name or name.islower()
+        return self._var_re.match(name) is not None
     
     def _is_valid_python_function_name(self, name: str) -> bool:
         """Check if a Python function name follows conventions."""
-        return name.islower() and ('_' in name or name.islower())
+        return self._var_re.match(name) is not None
     
     def _is_valid_python_class_name(self, name: str) -> bool:
         """Check if a Python class name follows conventions."""
-        return name[0].isupper() and name[1:].islower()
+        return self._class_re.match(name) is not None
     
+    def _analyze_files(self, code_files: Dict[str, str]) -> List[Tuple[str, CodeMetrics]]:
+        """Analyze files, fanning out to a process pool for larger batches."""
+        cpu_count = os.cpu_count() or 1
+        if (
+            cpu_count > 1
+            and len(code_files) > 1
+            and sum(len(content) for content in code_files.values()) >= PARALLEL_ANALYSIS_MIN_BYTES
+        ):
+            chunksize = max(1, len(code_files) // (4 * cpu_count))
+            executor = self._get_executor()
+            try:
+                return list(executor.map(
+                    functools.partial(_analyze_worker, self.max_naming_nodes),
+                    code_files.items(),
+                    chunksize=chunksize
+                ))
+            except BrokenProcessPool as e:
+                logger.warning(f"Process pool failed, analyzing files sequentially: {e}")
+                CodeAnalysisService._discard_executor(executor)
+
+        return [
+            (file_path, self.analyze_code_file(Path(file_path), content))
+            for file_path, content in code_files.items()
+        ]
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        """Return the process pool shared by all service instances."""
+        with cls._executor_lock:
+            if cls._executor is None:
+                # spawn, since this runs from worker threads of a process that has
+                # already started gRPC and HTTP client threads, where fork is unsafe
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+                )
+            return cls._executor
+
+    @classmethod
+    def _discard_executor(cls, executor: ProcessPoolExecutor) -> None:
+        """Shut down a broken pool; the next call starts a fresh one."""
+        with cls._executor_lock:
+            # Another thread may already have replaced it
+            if cls._executor is executor:
+                cls._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def shutdown_executor(cls) -> None:
+        """Stop the shared process pool, if one was started."""
+        with cls._executor_lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def get_code_summary(self, code_files: Dict[str, str]) -> Dict[str, Any]:
         """
         Get summary of code analysis for multiple files.
@@ -280,13 +385,9 @@ class CodeAnalysisService:
             Dictionary with summary statistics
         """
         total_metrics = CodeMetrics(0, 0, 0, 0, 0, 0.0, 0.0)
-        file_metrics = {}
+        file_metrics = dict(self._analyze_files(code_files))
         
-        for file_path, content in code_files.items():
-            path = Path(file_path)
-            metrics = self.analyze_code_file(path, content)
-            file_metrics[file_path] = metrics
-            
+        for metrics in file_metrics.values():
             # Aggregate metrics
             total_metrics.lines_of_code += metrics.lines_of_code
             total_metrics.lines_of_comments += metrics.lines_of_comments
@@ -299,7 +400,12 @@ class CodeAnalysisService:
         if file_count > 0:
             avg_complexity = total_metrics.complexity_score / file_count
             avg_docstring_coverage = sum(m.docstring_coverage for m in file_metrics.values()) / file_count
-            avg_naming_score = sum(m.naming_convention_score for m in file_metrics.values()) / file_count
+            # Unscored files are left out of the naming average
+            naming_scores = [
+                m.naming_convention_score for m in file_metrics.values()
+                if m.naming_convention_score is not None
+            ]
+            avg_naming_score = sum(naming_scores) / len(naming_scores) if naming_scores else 0
         else:
             avg_complexity = 0
             avg_docstring_coverage = 0
@@ -324,3 +430,51 @@ class CodeAnalysisService:
                 "naming_convention_score": v.naming_convention_score
             } for k, v in file_metrics.items()}
         }
+
+    def get_code_summary_cached(self, code_files: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Same as get_code_summary, memoized on a hash of the submitted files.
+
+        Args:
+            code_files: Dictionary mapping file paths to content
+
+        Returns:
+            Dictionary with summary statistics
+        """
+        # Hashing very large submissions costs about as much as analyzing them
+        if sum(len(content) for content in code_files.values()) > SUMMARY_CACHE_MAX_BYTES:
+            return self.get_code_summary(code_files)
+
+        digest = hashlib.sha256()
+        for file_path, content in sorted(code_files.items()):
+            digest.update(file_path.encode())
+            digest.update(b"\0")
+            digest.update(content.encode())
+            digest.update(b"\0")
+        key = digest.hexdigest()
+
+        with self._summary_cache_lock:
+            summary = self._summary_cache.get(key)
+            if summary is not None:
+                self._summary_cache.move_to_end(key)
+                return summary
+
+        summary = self.get_code_summary(code_files)
+        with self._summary_cache_lock:
+            self._summary_cache[key] = summary
+            if len(self._summary_cache) > SUMMARY_CACHE_MAXSIZE:
+                self._summary_cache.popitem(last=False)
+        return summary
+
+
+# Per-process service used by pool workers
+_worker_service: Optional[CodeAnalysisService] = None
+
+
+def _analyze_worker(max_naming_nodes: int, item: Tuple[str, str]) -> Tuple[str, CodeMetrics]:
+    """Analyze a single (path, content) pair inside a pool worker."""
+    global _worker_service
+    if _worker_service is None or _worker_service.max_naming_nodes != max_naming_nodes:
+        _worker_service = CodeAnalysisService(max_naming_nodes=max_naming_nodes)
+    file_path, content = item
+    return file_path, _worker_service.analyze_code_file(Path(file_path), content)
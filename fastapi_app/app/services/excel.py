@@ -1,83 +1,460 @@
 import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import openpyxl
+from openpyxl.utils import get_column_letter
 from pathlib import Path
+import asyncio
 import io
-import os
+import threading
+import time
+import uuid
 from datetime import timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from google.api_core.exceptions import NotFound, PreconditionFailed
 import google.auth
 from google.auth import impersonated_credentials
 
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter is optional; workbooks fall back to openpyxl
+    xlsxwriter = None
+
 from ..core import logger, retry
 from ..core.config import settings
 from ..models.schemas import ReviewResponse
+from .gcs import AioStorage, get_storage_client
+
+
+REVIEW_COLUMNS = [
+    'Username', 'Lecture', 'Task', 'Score (%)', 'Comments',
+    'Technical Correctness', 'Code Style', 'Documentation',
+    'Performance', 'Review Date'
+]
+
+# Rows per Parquet row group, the unit a filtered read can skip
+PARQUET_ROW_GROUP_SIZE = 5000
+
+# Uploads larger than this switch from a single request to resumable chunks
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+
+
+def _read_reviews_sheet(content: bytes) -> pd.DataFrame:
+    """Parse the Reviews sheet by streaming rows from a read-only workbook."""
+    workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        rows = workbook['Reviews'].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=REVIEW_COLUMNS)
+        return pd.DataFrame(rows, columns=header)
+    finally:
+        workbook.close()
+
+
+def _parquet_bytes(df: pd.DataFrame) -> bytes:
+    """Serialize a frame as zstd-compressed Parquet."""
+    output_buffer = io.BytesIO()
+    df.to_parquet(
+        output_buffer, engine='pyarrow', compression='zstd', index=False,
+        row_group_size=PARQUET_ROW_GROUP_SIZE
+    )
+    return output_buffer.getvalue()
+
+
+def _latest_reviews(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep the most recent row for each (Username, Task); later rows win ties."""
+    df['Task'] = df['Task'].astype(str)
+    df = df.iloc[df['Review Date'].fillna('').astype(str).argsort(kind='stable')]
+    return df.drop_duplicates(subset=['Username', 'Task'], keep='last').reset_index(drop=True)
 
 
 class ExcelService:
-    """Service for handling Excel files with review results stored in GCS."""
+    """
+    Service for review results stored in GCS.
 
-    def __init__(self, results_dir: Optional[Path] = None):
-        self.gcs_client = storage.Client(project=settings.gcp_project_id)
-        self.bucket_name = os.environ.get("GCS_BUCKET_NAME")
+    Parquet is the canonical storage: updates are appended as journal shards
+    and folded into the lecture table by compact_lecture. .xlsx reports are
+    generated on demand by export_lecture.
+    """
+
+    def __init__(self, results_dir: Optional[Path] = None, gcs_client: Optional[storage.Client] = None):
+        self.gcs_client = gcs_client or get_storage_client()
+        self.bucket_name = settings.gcs_bucket_name
         self.results_folder = "results"
+        self._arrow_fs: Optional[pafs.GcsFileSystem] = None
+        self._signing_credentials: Optional[impersonated_credentials.Credentials] = None
+        self._signer_lock = threading.Lock()
 
     def get_excel_blob_path(self, lecture_number: int) -> str:
         """Get the GCS blob path for a specific lecture's Excel file."""
         return f"{self.results_folder}/lecture_{lecture_number}_reviews.xlsx"
 
-    def get_student_reviews(self, lecture_number: int, username: Optional[str] = None) -> pd.DataFrame:
+    def get_parquet_blob_path(self, lecture_number: int) -> str:
+        """Get the GCS blob path for a specific lecture's canonical Parquet data."""
+        return f"{self.results_folder}/lecture_{lecture_number}_reviews.parquet"
+
+    def get_journal_prefix(self, lecture_number: int) -> str:
+        """Get the GCS prefix under which a lecture's uncompacted review shards are written."""
+        return f"{self.results_folder}/lecture_{lecture_number}_reviews.journal/"
+
+    def _list_review_blobs(
+        self, lecture_number: int
+    ) -> Tuple[Optional[storage.Blob], Optional[storage.Blob], List[storage.Blob]]:
         """
-        Get review results from Excel file in GCS.
+        List a lecture's stored review objects with a single GCS listing.
+
+        Returns the canonical Parquet blob and the Excel blob (None when
+        missing), plus the journal shards in write order.
+        """
+        parquet_path = self.get_parquet_blob_path(lecture_number)
+        excel_path = self.get_excel_blob_path(lecture_number)
+        journal_prefix = self.get_journal_prefix(lecture_number)
+
+        parquet_blob = excel_blob = None
+        shards = []
+        for blob in self.gcs_client.list_blobs(
+            self.bucket_name, prefix=f"{self.results_folder}/lecture_{lecture_number}_reviews."
+        ):
+            if blob.name == parquet_path:
+                parquet_blob = blob
+            elif blob.name == excel_path:
+                excel_blob = blob
+            elif blob.name.startswith(journal_prefix) and blob.name.endswith(".parquet"):
+                shards.append(blob)
+        shards.sort(key=lambda blob: blob.name)
+        return parquet_blob, excel_blob, shards
+
+    def _load_reviews(
+        self,
+        lecture_number: int,
+        blobs: Optional[Tuple[Optional[storage.Blob], Optional[storage.Blob], List[storage.Blob]]] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Load a lecture's reviews from GCS: the compacted Parquet table (or a
+        legacy Excel file) merged with any journal shards written since.
+        Returns None when nothing is stored.
+        """
+        parquet_blob, excel_blob, shards = blobs or self._list_review_blobs(lecture_number)
+
+        frames = []
+        if parquet_blob is None and excel_blob is not None:
+            logger.info(f"Loading legacy Excel reviews for lecture {lecture_number}")
+            frames.append(_read_reviews_sheet(excel_blob.download_as_bytes()))
+
+        parquet_blobs = ([parquet_blob] if parquet_blob is not None else []) + shards
+        frames.extend(self._download_parquet_frames(parquet_blobs))
+
+        if not frames:
+            return None
+        return _latest_reviews(pd.concat(frames, ignore_index=True))
+
+    def _download_parquet_frames(self, blobs: List[storage.Blob]) -> List[pd.DataFrame]:
+        """Download Parquet objects concurrently in one batch and parse each into a frame."""
+        if not blobs:
+            return []
+        buffers = [io.BytesIO() for _ in blobs]
+        transfer_manager.download_many(
+            list(zip(blobs, buffers)),
+            max_workers=16,
+            worker_type=transfer_manager.THREAD,
+            raise_exception=True
+        )
+        frames = []
+        for buffer in buffers:
+            buffer.seek(0)
+            frames.append(pd.read_parquet(buffer, engine='pyarrow'))
+        return frames
+
+    def _upload_parquet(self, blob_path: str, df: pd.DataFrame, if_generation_match: Optional[int] = None) -> None:
+        """
+        Upload a frame to GCS as zstd-compressed Parquet.
+
+        if_generation_match makes the write conditional on the object's
+        current generation (0 means it must not exist yet).
+        """
+        blob = self.gcs_client.bucket(self.bucket_name).blob(blob_path)
+        # Payloads under the chunk size go out as one multipart request;
+        # larger ones are resumable in few, large chunks
+        blob.chunk_size = UPLOAD_CHUNK_SIZE
+        blob.upload_from_string(
+            _parquet_bytes(df),
+            content_type=PARQUET_CONTENT_TYPE,
+            checksum='crc32c',
+            if_generation_match=if_generation_match
+        )
+        logger.info(f"Successfully uploaded reviews to GCS: gs://{self.bucket_name}/{blob_path}")
+
+    def compact_lecture(self, lecture_number: int) -> Optional[pd.DataFrame]:
+        """
+        Fold a lecture's journal shards into its canonical Parquet table.
+
+        Only the shards seen by this call are deleted, so reviews journaled
+        while compaction runs are kept for the next one. Returns the merged
+        reviews, or None when nothing is stored.
+        """
+        blobs = self._list_review_blobs(lecture_number)
+        df = self._load_reviews(lecture_number, blobs)
+        parquet_blob, _, shards = blobs
+        if df is not None and shards:
+            # Clustering by Username keeps each row group's min/max statistics
+            # narrow, so filtered reads can skip row groups without the user
+            df = df.sort_values(['Username', 'Task'], kind='stable', ignore_index=True)
+            try:
+                # Only replace the table this compaction read, so a concurrent
+                # compaction can't be overwritten with staler data
+                self._upload_parquet(
+                    self.get_parquet_blob_path(lecture_number), df,
+                    if_generation_match=parquet_blob.generation if parquet_blob is not None else 0
+                )
+            except PreconditionFailed:
+                logger.info(f"Lecture {lecture_number} was compacted concurrently; keeping its journal")
+                return df
+            self.gcs_client.bucket(self.bucket_name).delete_blobs(shards, on_error=lambda blob: None)
+            logger.info(f"Compacted {len(shards)} journal shards for lecture {lecture_number}")
+        return df
+
+    def get_student_reviews(
+        self,
+        lecture_number: int,
+        username: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Get review results for a lecture from GCS.
+
+        The username filter and column selection are pushed down into the
+        Parquet scan, so only matching row groups and requested columns are
+        read and decoded.
         """
         if not self.bucket_name:
             logger.error("GCS_BUCKET_NAME environment variable not set.")
             return pd.DataFrame()
 
-        try:
-            bucket = self.gcs_client.bucket(self.bucket_name)
-            blob_path = self.get_excel_blob_path(lecture_number)
-            blob = bucket.blob(blob_path)
-
-            if not blob.exists():
-                logger.warning(f"Excel file not found in GCS: gs://{self.bucket_name}/{blob_path}")
-                return pd.DataFrame()
+        for attempt in range(2):
+            try:
+                return self._read_student_reviews(lecture_number, username, columns)
+            except (NotFound, FileNotFoundError) as e:
+                # A concurrent compact_lecture deleted shards after they were
+                # listed; a fresh listing finds their rows in the table
+                if attempt == 0:
+                    logger.info(f"Review objects changed while reading lecture {lecture_number}, retrying: {e}")
+                    continue
+                logger.error(f"Failed to get student reviews from GCS: {e}")
+            except Exception as e:
+                logger.error(f"Failed to get student reviews from GCS: {e}")
+                break
+        return pd.DataFrame()
 
-            file_content = blob.download_as_bytes()
-            df = pd.read_excel(io.BytesIO(file_content), sheet_name='Reviews')
-            
+    def _read_student_reviews(
+        self, lecture_number: int, username: Optional[str], columns: Optional[List[str]]
+    ) -> pd.DataFrame:
+        """List a lecture's review objects and read them with the given filter pushed down."""
+        parquet_blob, excel_blob, shards = self._list_review_blobs(lecture_number)
+        if parquet_blob is None and excel_blob is not None:
+            # Lectures that predate Parquet storage only have a workbook
+            df = self._load_reviews(lecture_number, (parquet_blob, excel_blob, shards))
             if username:
                 df = df[df['Username'] == username]
+        else:
+            parquet_blobs = ([parquet_blob] if parquet_blob is not None else []) + shards
+            if not parquet_blobs:
+                logger.warning(f"No reviews found in GCS for lecture {lecture_number}")
+                return pd.DataFrame()
 
-            return df
+            dataset = ds.dataset(
+                [f"{self.bucket_name}/{blob.name}" for blob in parquet_blobs],
+                filesystem=self._get_arrow_filesystem(),
+                format="parquet"
+            )
+            # The dedup keys are always read so journaled rows can supersede older ones
+            read_columns = list(dict.fromkeys(['Username', 'Task', 'Review Date', *columns])) if columns else None
+            table = dataset.to_table(
+                columns=read_columns,
+                filter=(ds.field('Username') == username) if username else None
+            )
+            df = _latest_reviews(table.to_pandas())
+
+        return df[columns] if columns else df
+
+    def _get_arrow_filesystem(self) -> pafs.GcsFileSystem:
+        """Return the Arrow GCS filesystem, created on first use."""
+        if self._arrow_fs is None:
+            self._arrow_fs = pafs.GcsFileSystem()
+        return self._arrow_fs
+
+    def export_to_csv(self, lecture_number: int, output_path: Path) -> bool:
+        """
+        Export a lecture's reviews from GCS to a CSV file.
+
+        The compacted table is streamed to the file one record batch at a
+        time, so memory is bounded by the batch size and the journal shards
+        rather than the size of the lecture. Journal rows are written last,
+        except where the table holds a newer review for the same task.
+        """
+        if not self.bucket_name:
+            logger.error("GCS_BUCKET_NAME environment variable not set.")
+            return False
+
+        try:
+            parquet_blob, excel_blob, shards = self._list_review_blobs(lecture_number)
+            if parquet_blob is None:
+                # Legacy workbooks and journal-only lectures are small enough
+                # to merge in memory
+                df = self._load_reviews(lecture_number, (parquet_blob, excel_blob, shards))
+                if df is None:
+                    logger.warning(f"No reviews found in GCS for lecture {lecture_number}")
+                    return False
+                df.to_csv(output_path, index=False)
+            else:
+                self._stream_csv(parquet_blob, shards, output_path)
+
+            logger.info(f"Exported lecture {lecture_number} reviews to {output_path}")
+            return True
         except Exception as e:
-            logger.error(f"Failed to get student reviews from GCS: {e}")
-            return pd.DataFrame()
+            logger.error(f"Failed to export reviews to CSV: {e}")
+            return False
+
+    def _stream_csv(self, parquet_blob: storage.Blob, shards: List[storage.Blob], output_path: Path) -> None:
+        """Write the table batch by batch, resolving keys shared with the journal like _latest_reviews."""
+        journal_frames = self._download_parquet_frames(shards)
+        journal = _latest_reviews(pd.concat(journal_frames, ignore_index=True)) if journal_frames else None
+        journal_dates = (
+            journal.set_index(['Username', 'Task'])['Review Date'].fillna('').astype(str)
+            if journal is not None else None
+        )
+        # Journal rows whose task has a strictly newer review in the table
+        superseded = set()
+
+        with self._get_arrow_filesystem().open_input_file(f"{self.bucket_name}/{parquet_blob.name}") as source, \
+                open(output_path, 'w', newline='', encoding='utf-8') as output:
+            parquet_file = pq.ParquetFile(source)
+            columns = parquet_file.schema_arrow.names
+            pd.DataFrame(columns=columns).to_csv(output, index=False)
+
+            for batch in parquet_file.iter_batches(batch_size=PARQUET_ROW_GROUP_SIZE):
+                chunk = batch.to_pandas()
+                if journal_dates is not None:
+                    chunk['Task'] = chunk['Task'].astype(str)
+                    keys = pd.MultiIndex.from_frame(chunk[['Username', 'Task']])
+                    in_journal = keys.isin(journal_dates.index)
+                    if in_journal.any():
+                        # Later dates win and the journal wins ties, as in _latest_reviews
+                        table_dates = chunk['Review Date'].fillna('').astype(str).to_numpy()[in_journal]
+                        table_newer = table_dates > journal_dates.reindex(keys[in_journal]).to_numpy()
+                        superseded.update(keys[in_journal][table_newer])
+                        keep = ~in_journal
+                        keep[in_journal] = table_newer
+                        chunk = chunk[keep]
+                chunk.to_csv(output, header=False, index=False)
+
+            if journal is not None:
+                keys = pd.MultiIndex.from_frame(journal[['Username', 'Task']])
+                journal[~keys.isin(list(superseded))].reindex(columns=columns).to_csv(
+                    output, header=False, index=False
+                )
+
+    def export_lecture(self, lecture_number: int) -> Optional[bytes]:
+        """
+        Compact a lecture's reviews and materialize them as an .xlsx workbook.
+
+        The workbook is uploaded next to the Parquet data, so signed download
+        URLs point at an up-to-date file, and its bytes are returned.
+        """
+        if not self.bucket_name:
+            logger.error("GCS_BUCKET_NAME environment variable not set.")
+            return None
+
+        try:
+            df = self.compact_lecture(lecture_number)
+            if df is None:
+                logger.warning(f"No reviews found in GCS for lecture {lecture_number}")
+                return None
+
+            content = self._write_workbook(df.sort_values(['Username', 'Task'], kind='stable'))
+
+            blob_path = self.get_excel_blob_path(lecture_number)
+            self.gcs_client.bucket(self.bucket_name).blob(blob_path).upload_from_string(
+                content, content_type=XLSX_CONTENT_TYPE
+            )
+            logger.info(f"Exported Excel report to GCS: gs://{self.bucket_name}/{blob_path}")
+            return content
+        except Exception as e:
+            logger.error(f"Failed to export Excel report for lecture {lecture_number}: {e}")
+            return None
+
+    def _write_workbook(self, df: pd.DataFrame) -> bytes:
+        """Serialize reviews to .xlsx bytes, streaming rows when xlsxwriter is available."""
+        widths = self._column_widths(df)
+        output_buffer = io.BytesIO()
+        if xlsxwriter is not None:
+            # constant_memory flushes each row once a later row is started, so
+            # rows are written whole and in order rather than through
+            # to_excel, which fills the sheet column by column
+            workbook = xlsxwriter.Workbook(output_buffer, {'constant_memory': True})
+            worksheet = workbook.add_worksheet('Reviews')
+            for idx, width in enumerate(widths):
+                worksheet.set_column(idx, idx, width)
+            worksheet.write_row(0, 0, [str(column) for column in df.columns])
+            # object dtype turns numpy scalars into Python values; NaN becomes
+            # None, which xlsxwriter leaves as an empty cell
+            values = df.astype(object).where(df.notna(), None)
+            for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+                worksheet.write_row(row_idx, 0, row)
+            workbook.close()
+        else:
+            with pd.ExcelWriter(output_buffer, engine='openpyxl') as writer:
+                df.to_excel(writer, sheet_name='Reviews', index=False)
+                worksheet = writer.sheets['Reviews']
+                for idx, width in enumerate(widths, start=1):
+                    worksheet.column_dimensions[get_column_letter(idx)].width = width
+        return output_buffer.getvalue()
+
+    @staticmethod
+    def _column_widths(df: pd.DataFrame, max_width: int = 50) -> List[int]:
+        """Fit each column to its longest header or value, computed per column in pandas."""
+        widths = []
+        for col in df.columns:
+            value_length = int(df[col].fillna('').astype(str).str.len().max()) if len(df) else 0
+            widths.append(min(max(len(str(col)), value_length) + 2, max_width))
+        return widths
+
+    def _get_signer(self) -> impersonated_credentials.Credentials:
+        """Return the impersonated signing credentials, resolving ADC only once."""
+        # Lectures may be signed from several threads at once
+        with self._signer_lock:
+            if self._signing_credentials is None:
+                # Get the application's default credentials
+                source_credentials, project = google.auth.default()
+
+                # Create impersonated credentials, which can act as a signer.
+                self._signing_credentials = impersonated_credentials.Credentials(
+                    source_credentials=source_credentials,
+                    target_principal=settings.service_account_email,
+                    target_scopes=["https://www.googleapis.com/auth/devstorage.read_only"],
+                )
+            return self._signing_credentials
 
     def get_excel_signed_url(self, lecture_number: int) -> Optional[str]:
-        """Generates a signed URL to download the Excel file using the IAM API."""
+        """
+        Generates a signed URL to download the Excel file using the IAM API.
+
+        The object is not probed first; a URL for a missing file returns 404
+        when followed.
+        """
         if not self.bucket_name or not settings.service_account_email:
             logger.error("GCS_BUCKET_NAME or SERVICE_ACCOUNT_EMAIL environment variable not set.")
             return None
         
         try:
-            # Get the application's default credentials
-            source_credentials, project = google.auth.default()
-            
-            # Create impersonated credentials, which can act as a signer.
-            signing_credentials = impersonated_credentials.Credentials(
-                source_credentials=source_credentials,
-                target_principal=settings.service_account_email,
-                target_scopes=["https://www.googleapis.com/auth/devstorage.read_only"],
-            )
-
-            bucket = self.gcs_client.bucket(self.bucket_name)
-            blob_path = self.get_excel_blob_path(lecture_number)
-            blob = bucket.blob(blob_path)
-
-            if not blob.exists():
-                logger.warning(f"Cannot generate signed URL. File not found: gs://{self.bucket_name}/{blob_path}")
-                return None
+            blob = self.gcs_client.bucket(self.bucket_name).blob(self.get_excel_blob_path(lecture_number))
 
             # The blob object's generate_signed_url method can directly use the
             # impersonated credentials to sign the URL.
@@ -85,7 +462,7 @@ class ExcelService:
                 version="v4",
                 expiration=timedelta(hours=1),
                 method="GET",
-                credentials=signing_credentials,
+                credentials=self._get_signer(),
             )
             
             logger.info("Successfully generated signed URL using IAM.")
@@ -95,61 +472,97 @@ class ExcelService:
             logger.error(f"Failed to generate signed URL with IAM: {e}")
             return None
 
-    @retry()
     def update_student_review(self, lecture_number: int, review_response: ReviewResponse) -> None:
         """
-        Update Excel file in GCS with review results for a student.
+        Record review results for a student in GCS.
+        """
+        self.update_student_reviews(lecture_number, [review_response])
+
+    def update_student_reviews(self, lecture_number: int, review_responses: List[ReviewResponse]) -> None:
+        """
+        Record review results for several students as one journal shard in GCS.
+
+        Nothing is downloaded: the shard is appended next to the lecture's
+        table and merged on read until compact_lecture folds it in.
         """
         if not self.bucket_name:
             logger.error("GCS_BUCKET_NAME environment variable not set. Cannot access GCS.")
             return
 
-        bucket = self.gcs_client.bucket(self.bucket_name)
-        blob_path = self.get_excel_blob_path(lecture_number)
-        blob = bucket.blob(blob_path)
+        shard = self._build_journal_shard(lecture_number, review_responses)
+        if shard is None:
+            return
+        shard_path, updates = shard
+        self._upload_journal_shard(shard_path, updates)
+
+    @retry()
+    def _upload_journal_shard(self, shard_path: str, updates: pd.DataFrame) -> None:
+        """
+        Upload a journal shard that must not exist yet.
 
+        Retries reuse the shard's unique name, so PreconditionFailed means an
+        earlier attempt reached GCS even though its response was lost.
+        """
         try:
-            file_content = blob.download_as_bytes()
-            df = pd.read_excel(io.BytesIO(file_content), sheet_name='Reviews')
-            logger.info(f"Loaded existing Excel file from GCS: gs://{self.bucket_name}/{blob_path}")
-        except Exception:
-            logger.info("Excel file not found in GCS. Creating a new one.")
-            df = pd.DataFrame(columns=[
-                'Username', 'Lecture', 'Task', 'Score (%)', 'Comments',
-                'Technical Correctness', 'Code Style', 'Documentation',
-                'Performance', 'Review Date'
-            ])
-            
-        for task_review in review_response.details:
-            mask = (df['Username'] == review_response.username) & (df['Task'].astype(str) == str(task_review.task))
-
-            if mask.any():
-                df.loc[mask, 'Score (%)'] = task_review.score
-                df.loc[mask, 'Comments'] = task_review.comments
-                df.loc[mask, 'Technical Correctness'] = task_review.technical_correctness
-                df.loc[mask, 'Code Style'] = task_review.code_style
-                df.loc[mask, 'Documentation'] = task_review.documentation
-                df.loc[mask, 'Performance'] = task_review.performance
-                df.loc[mask, 'Review Date'] = task_review.review_timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                new_row = {
-                    'Username': review_response.username,
-                    'Lecture': lecture_number,
-                    'Task': task_review.task,
-                    'Score (%)': task_review.score,
-                    'Comments': task_review.comments,
-                    'Technical Correctness': task_review.technical_correctness,
-                    'Code Style': task_review.code_style,
-                    'Documentation': task_review.documentation,
-                    'Performance': task_review.performance,
-                    'Review Date': task_review.review_timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                }
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+            self._upload_parquet(shard_path, updates, if_generation_match=0)
+        except PreconditionFailed:
+            logger.info(f"Journal shard already written by an earlier attempt: gs://{self.bucket_name}/{shard_path}")
 
-        output_buffer = io.BytesIO()
-        with pd.ExcelWriter(output_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Reviews', index=False)
+    async def update_student_reviews_async(
+        self, lecture_number: int, review_responses: List[ReviewResponse], aio_storage: "AioStorage"
+    ) -> None:
+        """
+        Like update_student_reviews, but uploads the shard with gcloud-aio-storage.
+
+        Only the frame and Parquet encoding run in a worker thread; the upload
+        itself is awaited on the event loop.
+        """
+        if not self.bucket_name:
+            logger.error("GCS_BUCKET_NAME environment variable not set. Cannot access GCS.")
+            return
+
+        shard = await asyncio.to_thread(self._build_journal_shard, lecture_number, review_responses)
+        if shard is None:
+            return
+        shard_path, updates = shard
+        payload = await asyncio.to_thread(_parquet_bytes, updates)
+        try:
+            await aio_storage.upload(
+                self.bucket_name,
+                shard_path,
+                payload,
+                content_type=PARQUET_CONTENT_TYPE,
+                parameters={'ifGenerationMatch': '0'}
+            )
+        except Exception as e:
+            # 412: the shard already exists, so an earlier attempt landed
+            if getattr(e, 'status', None) != 412:
+                raise
+        logger.info(f"Successfully uploaded reviews to GCS: gs://{self.bucket_name}/{shard_path}")
+
+    def _build_journal_shard(
+        self, lecture_number: int, review_responses: List[ReviewResponse]
+    ) -> Optional[Tuple[str, pd.DataFrame]]:
+        """Build a journal shard path and its rows, or None when there is nothing to record."""
+        updates = pd.DataFrame([
+            {
+                'Username': review_response.username,
+                'Lecture': lecture_number,
+                'Task': str(task_review.task),
+                'Score (%)': task_review.score,
+                'Comments': task_review.comments,
+                'Technical Correctness': task_review.technical_correctness,
+                'Code Style': task_review.code_style,
+                'Documentation': task_review.documentation,
+                'Performance': task_review.performance,
+                'Review Date': task_review.review_timestamp.strftime('%Y-%m-%d %H:%M:%S')
+            }
+            for review_response in review_responses
+            for task_review in review_response.details
+        ], columns=REVIEW_COLUMNS)
+        if updates.empty:
+            return None
 
-        output_buffer.seek(0)
-        blob.upload_from_file(output_buffer, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        logger.info(f"Successfully uploaded updated Excel file to GCS: gs://{self.bucket_name}/{blob_path}")
\ No newline at end of file
+        # Zero-padded nanosecond prefixes make shard names sort in write order
+        shard_path = f"{self.get_journal_prefix(lecture_number)}{time.time_ns():020d}-{uuid.uuid4().hex}.parquet"
+        return shard_path, _latest_reviews(updates)
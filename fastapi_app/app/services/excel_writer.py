@@ -0,0 +1,93 @@
+"""
+Background writer that serializes and batches Excel updates.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Callable, List, Optional, Tuple
+
+from ..core import logger
+from ..models.schemas import ReviewResponse
+from .excel import ExcelService
+from .gcs import AioStorage, create_async_storage
+
+
+class ExcelWriteQueue:
+    """
+    Single asyncio worker that drains queued review results and writes them
+    with one ExcelService round-trip per lecture per drain cycle.
+    """
+
+    def __init__(self, excel_service_factory: Callable[[], ExcelService] = ExcelService):
+        self._excel_service_factory = excel_service_factory
+        self._excel_service: Optional[ExcelService] = None
+        self._queue: "asyncio.Queue[Tuple[int, ReviewResponse]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._aio_storage: Optional[AioStorage] = None
+        self._aio_storage_checked = False
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush pending writes and stop the writer task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._aio_storage is not None:
+            await self._aio_storage.close()
+            self._aio_storage = None
+        self._aio_storage_checked = False
+
+    async def put(self, lecture_number: int, review_response: ReviewResponse) -> None:
+        """Queue a student's review results for writing."""
+        await self._queue.put((lecture_number, review_response))
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                by_lecture = defaultdict(list)
+                for lecture_number, review_response in batch:
+                    by_lecture[lecture_number].append(review_response)
+                for lecture_number, review_responses in by_lecture.items():
+                    await self._write(lecture_number, review_responses)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, lecture_number: int, review_responses: List[ReviewResponse]) -> None:
+        try:
+            if self._excel_service is None:
+                self._excel_service = self._excel_service_factory()
+            if not self._aio_storage_checked:
+                # The aiohttp session must be created on the writer's loop
+                self._aio_storage = create_async_storage()
+                self._aio_storage_checked = True
+
+            if self._aio_storage is not None:
+                try:
+                    await self._excel_service.update_student_reviews_async(
+                        lecture_number, review_responses, self._aio_storage
+                    )
+                    return
+                except Exception as e:
+                    # Shard names are unique, so the retrying sync path can safely redo it
+                    logger.warning(f"Async upload failed for lecture {lecture_number}, retrying with sync client: {e}")
+
+            # pandas and GCS calls block, so keep them off the event loop
+            await asyncio.to_thread(
+                self._excel_service.update_student_reviews, lecture_number, review_responses
+            )
+        except Exception as e:
+            logger.error(f"Failed to write {len(review_responses)} reviews for lecture {lecture_number}: {e}")
@@ -0,0 +1,45 @@
+"""
+Shared Google Cloud Storage client.
+"""
+from functools import lru_cache
+from typing import Optional
+
+from google.cloud import storage
+from requests.adapters import HTTPAdapter
+
+from ..core import logger
+from ..core.config import settings
+
+try:
+    from gcloud.aio.storage import Storage as AioStorage
+except ImportError:  # gcloud-aio-storage is optional; uploads fall back to the sync client
+    AioStorage = None
+
+# Connections kept per host; covers the concurrent transfer_manager workers
+HTTP_POOL_SIZE = 32
+
+
+@lru_cache(maxsize=1)
+def get_storage_client() -> storage.Client:
+    """
+    Return the process-wide storage client.
+
+    Sharing one client keeps a single authorized session, so TLS connections
+    and access tokens are reused by every service.
+    """
+    client = storage.Client(project=settings.gcp_project_id)
+    client._http.mount("https://", HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
+    return client
+
+
+def create_async_storage() -> "Optional[AioStorage]":
+    """
+    Create an asyncio storage client, or return None when gcloud-aio-storage is unavailable.
+
+    The client owns an aiohttp session bound to the running event loop, so
+    create it from a coroutine and close it on the same loop.
+    """
+    if AioStorage is None:
+        logger.warning("gcloud-aio-storage is not installed; review uploads use the sync GCS client.")
+        return None
+    return AioStorage()
@@ -1,8 +1,13 @@
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Optional
 from ..core.config import settings
 
+# Seconds to wait on the SMTP server before giving up
+SMTP_TIMEOUT = 30
+
 class NotificationService:
     """A service for sending email notifications using SMTP."""
 
@@ -12,12 +17,59 @@ class NotificationService:
         self.smtp_user = settings.smtp_user
         self.smtp_password = settings.smtp_password
         self.sender_email = settings.sender_email
+        self._server: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+
+    def connect(self) -> bool:
+        """
+        Opens the SMTP session (TLS + login) ahead of sending, so the handshake
+        can overlap other work. Returns whether a session is ready.
+        """
+        if not self._is_configured():
+            return False
+        try:
+            with self._lock:
+                self._get_server()
+            return True
+        except Exception as e:
+            print(f"Failed to connect to SMTP server: {e}")
+            return False
+
+    def close(self) -> None:
+        """Closes the SMTP session, if one is open."""
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except smtplib.SMTPException:
+                    pass
+                self._server = None
+
+    def _is_configured(self) -> bool:
+        return all([self.smtp_host, self.smtp_port, self.smtp_user, self.smtp_password, self.sender_email])
+
+    def _get_server(self) -> smtplib.SMTP:
+        """Returns the open session after a NOOP health check, reconnecting if it went stale."""
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+        print(f"Connecting to SMTP server at {self.smtp_host}:{self.smtp_port}...")
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=SMTP_TIMEOUT)
+        server.starttls()  # Secure the connection
+        server.login(self.smtp_user, self.smtp_password)
+        self._server = server
+        return server
 
     def send_summary_email(self, recipient_email: str, subject: str, body_html: str):
         """
         Sends a summary email to a specified recipient via SMTP.
         """
-        if not all([self.smtp_host, self.smtp_port, self.smtp_user, self.smtp_password, self.sender_email]):
+        if not self._is_configured():
             print("ERROR: SMTP settings are incomplete. Cannot send email.")
             return
 
@@ -30,13 +82,10 @@ class NotificationService:
         message.attach(MIMEText(body_html, "html"))
 
         try:
-            print(f"Connecting to SMTP server at {self.smtp_host}:{self.smtp_port}...")
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()  # Secure the connection
-                server.login(self.smtp_user, self.smtp_password)
-                server.sendmail(
+            with self._lock:
+                self._get_server().sendmail(
                     self.sender_email, recipient_email, message.as_string()
                 )
-                print("Email sent successfully!")
+            print("Email sent successfully!")
         except Exception as e:
-            print(f"An unexpected error occurred while sending email: {e}")
\ No newline at end of file
+            print(f"An unexpected error occurred while sending email: {e}")
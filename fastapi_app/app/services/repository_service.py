@@ -1,13 +1,15 @@
+import functools
 import git
 import os
 import shutil
 import stat
 from github import Github, GithubException
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-from ..core import logger, is_code_file
+from ..core import logger, settings, is_code_file_by_name
 
 # --- NEW: Error handler for shutil.rmtree on Windows ---
 # This function helps delete files that git marks as read-only.
@@ -27,6 +29,20 @@ def remove_readonly(func, path, exc_info):
     else:
         raise
 
+# read_code_from_path reads sequentially below this many files
+PARALLEL_READ_MIN_FILES = 4
+MAX_READ_WORKERS = 16
+
+@functools.lru_cache(maxsize=128)
+def _scan_task_dirs(base_path: str, mtime_ns: int) -> Tuple[str, ...]:
+    """Lists task_* directories under base_path; mtime_ns is only part of the cache key."""
+    task_dirs = []
+    with os.scandir(base_path) as it:
+        for entry in it:
+            if entry.name.startswith("task_") and entry.is_dir(follow_symlinks=False):
+                task_dirs.append(entry.name)
+    return tuple(sorted(task_dirs))
+
 class RepositoryService:
     """Service for managing homework repository structure."""
 
@@ -49,13 +65,20 @@ class RepositoryService:
             
             clone_dir.mkdir(parents=True, exist_ok=True)
 
-            g = Github(os.environ.get("GITHUB_TOKEN"))
+            g = Github(settings.github_token)
             user = g.get_user(github_nickname)
             repo_name = f"lecture_{lecture_number}"
             repo = user.get_repo(repo_name)
             
             logger.info(f"Cloning repository for {github_nickname} into temporary directory: {clone_dir}")
-            git.Repo.clone_from(repo.clone_url, clone_dir)
+            # Reviews only need the current tree, so skip history, other
+            # branches, tags and LFS content
+            git.Repo.clone_from(
+                repo.clone_url,
+                clone_dir,
+                multi_options=['--depth=1', '--single-branch', '--filter=blob:none', '--no-tags'],
+                env={**os.environ, 'GIT_LFS_SKIP_SMUDGE': '1'}
+            )
             logger.info(f"Successfully cloned repository for {github_nickname}")
             
             return clone_dir
@@ -78,15 +101,16 @@ class RepositoryService:
                 logger.error(f"Failed to clean up temporary directory {user_folder}: {e}")
 
     def get_lecture_tasks(self, lecture_number: int, base_path: Optional[Path] = None) -> List[str]:
-        task_dirs = []
-        if not base_path or not base_path.exists():
-            return task_dirs
-            
-        for item in base_path.iterdir():
-            if item.is_dir() and item.name.startswith("task_"):
-                task_dirs.append(item.name)
+        if not base_path:
+            return []
+        try:
+            mtime_ns = base_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
 
-        return sorted(task_dirs)
+        # The directory mtime changes whenever entries are added or removed,
+        # so it invalidates the cached listing automatically
+        return list(_scan_task_dirs(str(base_path), mtime_ns))
 
     def read_code_from_path(self, task_path: Path) -> Dict[str, str]:
         """Reads all code files from a given task path."""
@@ -94,15 +118,49 @@ class RepositoryService:
         if not task_path.exists() or not task_path.is_dir():
             return code_content
 
-        for file_path in task_path.rglob("*"):
-            if file_path.is_file() and is_code_file(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    relative_path = file_path.relative_to(task_path)
-                    code_content[str(relative_path)] = content
-                except Exception as e:
-                    logger.warning(f"Failed to read file {file_path}: {e}")
-                    relative_path = file_path.relative_to(task_path)
-                    code_content[str(relative_path)] = f"Error reading file: {e}"
-        return code_content
\ No newline at end of file
+        # Every walked root is under task_path, so a prefix strip gives the
+        # relative path without Path.relative_to
+        base_len = len(str(task_path)) + 1
+
+        file_paths = list(self.iter_code_files(task_path))
+        if len(file_paths) < PARALLEL_READ_MIN_FILES:
+            for file_path in file_paths:
+                relative_path, content = self._read_code_file(file_path, base_len)
+                code_content[relative_path] = content
+            return code_content
+
+        # Reads release the GIL, so a small pool overlaps their latency;
+        # map keeps the walk order
+        with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(file_paths))) as executor:
+            for relative_path, content in executor.map(
+                lambda file_path: self._read_code_file(file_path, base_len), file_paths
+            ):
+                code_content[relative_path] = content
+        return code_content
+
+    def iter_code_files(self, task_path: Path) -> Iterator[str]:
+        """Lazily yields the paths of all code files under a task path."""
+        # Depth-first over os.scandir: DirEntry type checks reuse the data
+        # returned by the directory read instead of issuing a stat per entry
+        stack = [str(task_path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != '.git':
+                                stack.append(entry.path)
+                        elif is_code_file_by_name(entry.name) and entry.is_file(follow_symlinks=False):
+                            yield entry.path
+            except OSError as e:
+                logger.warning(f"Failed to scan directory: {e}")
+
+    def _read_code_file(self, file_path: str, base_len: int) -> Tuple[str, str]:
+        """Reads a single code file, returning its path relative to the task root."""
+        relative_path = file_path[base_len:]
+        try:
+            with open(file_path, 'rb') as f:
+                return relative_path, f.read().decode('utf-8', 'ignore')
+        except Exception as e:
+            logger.warning(f"Failed to read file {file_path}: {e}")
+            return relative_path, f"Error reading file: {e}"
@@ -0,0 +1,107 @@
+"""
+Semantic cache for review responses, matching near-duplicate submissions by embedding similarity.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..core import logger
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # sentence-transformers is optional; the cache stays disabled without it
+    SentenceTransformer = None
+
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Fingerprints are truncated to this many characters before embedding
+MAX_FINGERPRINT_CHARS = 4096
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """Load the embedding model once per process."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        return _model
+
+
+class SemanticCache:
+    """
+    In-memory nearest-neighbour cache over normalized prompt embeddings.
+
+    Vectors are L2-normalized, so an inner product against the stored matrix is
+    the cosine similarity. Entries expire after ``ttl`` seconds, and the least
+    recently used entry is evicted once ``maxsize`` is exceeded.
+    """
+
+    def __init__(self, threshold: float = 0.87, ttl: float = 7 * 24 * 3600, maxsize: int = 1024):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._vectors: List[np.ndarray] = []
+        self._responses: List[Dict[str, Any]] = []
+        self._created_at: List[float] = []
+        self._last_used: List[float] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Whether the optional embedding dependency is installed."""
+        return SentenceTransformer is not None
+
+    @staticmethod
+    def fingerprint(task: str, task_description: str, code_content: Dict[str, str]) -> str:
+        """Build the normalized text that is embedded for a review request."""
+        parts = [task, task_description]
+        parts.extend(code_content[file_path] for file_path in sorted(code_content))
+        return "\n".join(parts)[:MAX_FINGERPRINT_CHARS]
+
+    def embed(self, text: str) -> np.ndarray:
+        return _get_model().encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def get(self, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._vectors:
+                return None
+            similarities = np.stack(self._vectors) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] <= self.threshold:
+                return None
+
+            now = time.monotonic()
+            if now - self._created_at[best] >= self.ttl:
+                self._remove(best)
+                return None
+
+            self._last_used[best] = now
+            return self._responses[best]
+
+    def set(self, vector: np.ndarray, response: Dict[str, Any]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._vectors.append(vector)
+            self._responses.append(response)
+            self._created_at.append(now)
+            self._last_used.append(now)
+            if len(self._vectors) > self.maxsize:
+                self._remove(int(np.argmin(self._last_used)))
+
+    def _remove(self, index: int) -> None:
+        for entries in (self._vectors, self._responses, self._created_at, self._last_used):
+            del entries[index]
+
+
+def create_semantic_cache(threshold: float) -> Optional[SemanticCache]:
+    """Create a SemanticCache, or return None when embeddings are unavailable."""
+    if not SemanticCache.is_available():
+        logger.warning("sentence-transformers is not installed; semantic review cache disabled.")
+        return None
+    return SemanticCache(threshold=threshold)
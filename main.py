@@ -1,22 +1,98 @@
+import html
+import multiprocessing
 import os
-import json
+import orjson
 import asyncio
-from datetime import datetime
-from google.cloud import storage
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from functools import lru_cache, partial
+from google.api_core.exceptions import NotFound
 
 try:
     from fastapi_app.app.agents import HomeworkReviewAgent
     from fastapi_app.app.services.notification import NotificationService
-    from fastapi_app.app.services.repository_service import RepositoryService
-    from fastapi_app.app.services.excel import ExcelService
+    from fastapi_app.app.services.gcs import get_storage_client
     from fastapi_app.app.core.config import settings
 except ImportError as e:
     print(f"CRITICAL ERROR: Failed to import application modules: {e}")
 
 
+# Summary email body; outcomes and links are pre-rendered <li> items
+BODY_TEMPLATE = """
+<html>
+    <body>
+        <h1>AI Homework Review Report</h1>
+        <p>The weekly automated review process has completed. Here are the results:</p>
+        <h3>Review Outcomes:</h3>
+        <ul>{outcomes}</ul>
+        <h3>Download Reports:</h3>
+        <ul>{links}</ul>
+    </body>
+</html>
+"""
+
+
+# Parsed student configuration and the GCS generation it was read from;
+# warm instances reuse it until the object changes
+_students_cache = {"generation": None, "students": None}
+
+# Lecture reports exported and signed at once for the summary email
+MAX_EXPORT_WORKERS = 8
+
+
+# The one event loop every invocation runs on, owned by a background thread
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """Starts the process-wide event loop thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="review-event-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro):
+    """
+    Runs a coroutine on the process-wide event loop and waits for its result.
+
+    Invocations may arrive on different worker threads, but async clients held
+    by the memoized agent bind to the loop that first uses them, so every
+    invocation is submitted to the same loop instead of running its own.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+@lru_cache(maxsize=1)
+def _review_agent_for_loop(loop):
+    return HomeworkReviewAgent()
+
+
+def get_review_agent():
+    """
+    Returns the agent shared by invocations on this instance. Its repository
+    and Excel services are reused too, so clients and caches survive warm starts.
+
+    The agent's async clients bind to the loop that first drives them, so it
+    is cached against the loop run_async submits to and must only be used
+    from coroutines run there.
+    """
+    return _review_agent_for_loop(_get_loop())
+
+
+@lru_cache(maxsize=1)
+def get_notification_service():
+    return NotificationService()
+
+
 def load_students_from_gcs():
     """Loads and parses the student configuration from a JSON file in GCS."""
-    bucket_name = os.environ.get("GCS_BUCKET_NAME")
+    bucket_name = settings.gcs_bucket_name
     config_file_path = "config/students.json"
 
     if not bucket_name:
@@ -24,22 +100,88 @@ def load_students_from_gcs():
         return None
 
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(config_file_path)
-
-        if not blob.exists():
-            print(f"ERROR: Configuration file not found at gs://{bucket_name}/{config_file_path}.")
-            return None
+        blob = get_storage_client().bucket(bucket_name).blob(config_file_path)
+        # A metadata GET is enough to tell whether the cached copy is current;
+        # a missing file surfaces as NotFound
+        blob.reload()
+        if blob.generation == _students_cache["generation"]:
+            return _students_cache["students"]
 
-        config_content = blob.download_as_text()
-        students = json.loads(config_content)
+        students = orjson.loads(blob.download_as_bytes(if_generation_match=blob.generation))
+        _students_cache.update(generation=blob.generation, students=students)
         return students
-
+    except NotFound:
+        print(f"ERROR: Configuration file not found at gs://{bucket_name}/{config_file_path}.")
+        return None
     except Exception as e:
         print(f"CRITICAL ERROR during GCS operation: {e}")
         return None
 
+async def review_students(review_agent, repo_service, students, max_concurrency):
+    """
+    Reviews all students concurrently and returns one outcome line per student,
+    in input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Cleanup removes a user's whole clone folder, so reviews of the same user
+    # (different lectures) must not overlap
+    user_locks = defaultdict(asyncio.Lock)
+
+    async def review_one(student):
+        username = student['username']
+        lecture = student['lecture']
+        # The clone directory get_homework_from_github uses for this student
+        repo_path = repo_service.github_repos_path / username / f"lecture_{lecture}"
+        async with user_locks[username], semaphore:
+            print(f"-> Processing student: {username}, lecture: {lecture}")
+            try:
+                result = await review_agent.review_student(username=username, lecture_number=lecture)
+                return f"✅ SUCCESS: {username} - Avg Score: {result.average_score:.2f}"
+            except Exception as e:
+                return f"❌ ERROR: Failed to review {username}. Reason: {e}"
+            finally:
+                await asyncio.to_thread(repo_service.cleanup_repository, repo_path)
+
+    return await asyncio.gather(*(review_one(student) for student in students))
+
+def _review_partition(students):
+    """Process pool entry point: reviews a partition of students on its own event loop."""
+    review_agent = get_review_agent()
+    return run_async(
+        review_students(review_agent, review_agent.repo_service, students, settings.max_concurrent_reviews)
+    )
+
+def review_students_in_processes(students, processes):
+    """
+    Spreads students over worker processes and returns their outcome lines in
+    input order.
+
+    Students are partitioned by username so that the per-user cleanup lock in
+    review_students still covers every review of a user.
+    """
+    partitions = defaultdict(list)
+    for index, student in enumerate(students):
+        partitions[hash(student['username']) % processes].append((index, student))
+    partitions = list(partitions.values())
+
+    review_outcomes = [None] * len(students)
+    # spawn, since forking after gRPC and HTTP clients have started threads is unsafe
+    with ProcessPoolExecutor(max_workers=len(partitions), mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = executor.map(_review_partition, [[student for _, student in partition] for partition in partitions])
+        for partition, outcomes in zip(partitions, results):
+            for (index, _), outcome in zip(partition, outcomes):
+                review_outcomes[index] = outcome
+    return review_outcomes
+
+def export_report_link(excel_service, lecture_num):
+    """
+    Folds a lecture's journaled reviews into its table, builds the .xlsx and
+    returns a signed URL for it, or None if either step fails.
+    """
+    if excel_service.export_lecture(lecture_num) is None:
+        return None
+    return excel_service.get_excel_signed_url(lecture_num)
+
 def homework_review_triggered(request):
     """
     Google Cloud Function triggered by Cloud Scheduler.
@@ -56,72 +198,75 @@ def homework_review_triggered(request):
     print(f"Successfully loaded {len(students_to_review)} students for review.")
 
     try:
-        review_agent = HomeworkReviewAgent()
-        repo_service = RepositoryService()
-        excel_service = ExcelService()
-        review_outcomes = []
+        review_agent = get_review_agent()
+        repo_service = review_agent.repo_service
+        excel_service = review_agent.excel_service
     except Exception as e:
         print(f"CRITICAL ERROR during service initialization: {e}")
         return ('Failed to initialize services.', 500)
 
-    processed_lectures = set()
+    valid_students = []
     for student in students_to_review:
-        username = student.get('username')
-        lecture = student.get('lecture')
-        repo_path = None
-        processed_lectures.add(lecture)
-
-        if not username or not lecture:
+        if not student.get('username') or not student.get('lecture'):
             print(f"Skipping invalid student entry: {student}")
             continue
+        valid_students.append(student)
+    processed_lectures = {student['lecture'] for student in valid_students}
 
-        print(f"-> Processing student: {username}, lecture: {lecture}")
-
-        try:
-            result = asyncio.run(review_agent.review_student(username=username, lecture_number=lecture))
-            repo_path = repo_service.github_repos_path / username / f"lecture_{lecture}"
-            outcome = f"✅ SUCCESS: {username} - Avg Score: {result.average_score:.2f}"
-            review_outcomes.append(outcome)
-        except Exception as e:
-            outcome = f"❌ ERROR: Failed to review {username}. Reason: {e}"
-            review_outcomes.append(outcome)
-        finally:
-            if repo_path:
-                repo_service.cleanup_repository(repo_path)
-
-    print("--- Review Process Finished. Preparing email notification. ---")
-
-    if settings.smtp_host and settings.recipient_email:
-        notification_service = NotificationService()
-        subject = f"Weekly AI Homework Review Summary - {datetime.now().strftime('%Y-%m-%d')}"
-
-        links_html = ""
-        for lecture_num in sorted(list(processed_lectures)):
-            signed_url = excel_service.get_excel_signed_url(lecture_num)
-            if signed_url:
-                links_html += f'<li><a href="{signed_url}">Download Report for Lecture {lecture_num}</a> (Link valid for 1 hour)</li>'
-            else:
-                links_html += f"<li>Could not generate download link for Lecture {lecture_num} report.</li>"
-
-        outcomes_html = "".join([f"<li>{outcome}</li>" for outcome in review_outcomes])
-        body_html = f"""
-        <html>
-            <body>
-                <h1>AI Homework Review Report</h1>
-                <p>The weekly automated review process has completed. Here are the results:</p>
-                <h3>Review Outcomes:</h3>
-                <ul>{outcomes_html}</ul>
-                <h3>Download Reports:</h3>
-                <ul>{links_html}</ul>
-            </body>
-        </html>
-        """
-        notification_service.send_summary_email(
-            recipient_email=settings.recipient_email,
-            subject=subject,
-            body_html=body_html
-        )
+    # Reviews are mostly I/O bound and share one event loop by default; extra
+    # processes only pay off when the instance has spare vCPUs
+    processes = min(settings.review_processes, os.cpu_count() or 1, len(valid_students))
+    if processes > 1:
+        review_outcomes = review_students_in_processes(valid_students, processes)
     else:
+        review_outcomes = run_async(
+            review_students(review_agent, repo_service, valid_students, settings.max_concurrent_reviews)
+        )
+
+    print("--- Review Process Finished. ---")
+
+    # Without a recipient there is nothing to render, export or sign; only
+    # fold this run's journaled reviews into the lecture tables
+    if not (settings.smtp_host and settings.recipient_email):
         print("WARNING: SMTP settings not fully configured. Skipping email notification.")
+        for lecture_num in processed_lectures:
+            try:
+                excel_service.compact_lecture(lecture_num)
+            except Exception as e:
+                print(f"ERROR: Failed to compact reviews for lecture {lecture_num}: {e}")
+        return ('Weekly review process completed successfully!', 200)
+
+    print("--- Preparing email notification. ---")
+    notification_service = get_notification_service()
+    # One worker runs the SMTP handshake while reports are exported and
+    # signed, then sends; the function still waits for the send, as
+    # background work after returning may be starved of CPU
+    email_executor = ThreadPoolExecutor(max_workers=1)
+    email_executor.submit(notification_service.connect)
+    subject = f"Weekly AI Homework Review Summary - {date.today().isoformat()}"
+
+    # Lectures are exported and signed concurrently; each step is mostly
+    # GCS and IAM round trips
+    lectures = sorted(processed_lectures)
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_EXPORT_WORKERS, len(lectures)))) as executor:
+        signed_urls = list(executor.map(partial(export_report_link, excel_service), lectures))
+
+    links_html = ""
+    for lecture_num, signed_url in zip(lectures, signed_urls):
+        if signed_url:
+            links_html += f'<li><a href="{html.escape(signed_url)}">Download Report for Lecture {lecture_num}</a> (Link valid for 1 hour)</li>'
+        else:
+            links_html += f"<li>Could not generate download link for Lecture {lecture_num} report.</li>"
+
+    outcomes_html = "".join("<li>%s</li>" % html.escape(outcome) for outcome in review_outcomes)
+    body_html = BODY_TEMPLATE.format(outcomes=outcomes_html, links=links_html)
+    email_executor.submit(
+        notification_service.send_summary_email,
+        recipient_email=settings.recipient_email,
+        subject=subject,
+        body_html=body_html
+    )
+    email_executor.shutdown(wait=True)
+    notification_service.close()
 
     return ('Weekly review process completed successfully!', 200)
\ No newline at end of file